@@ -1,28 +1,87 @@
-import json
 import os
+import random
+import time
+from functools import wraps
 
-from flask import Flask, render_template, abort, request, redirect, url_for, session
-from flask_sqlalchemy import SQLAlchemy
+import click
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask, render_template, abort, request, redirect, url_for, session, jsonify, g
+from flask_sqlalchemy import SQLAlchemy, Pagination
 from flask_migrate import Migrate
-from sqlalchemy import func
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import func, Computed
+from sqlalchemy.exc import IntegrityError, OperationalError, InterfaceError, TimeoutError as PoolTimeoutError
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, insert as pg_insert
 from flask_wtf import FlaskForm
 from flask_wtf.csrf import CSRFProtect
 from wtforms import StringField, HiddenField, RadioField, SelectField
-from wtforms.validators import InputRequired
+from wtforms.validators import InputRequired, ValidationError
+
+from availability import WEEKDAYS, DEFAULT_TIMEZONE, DEFAULT_DURATION, ROLLING_WINDOW_DAYS, rolling_window, \
+    month_bounds, free_slots, parse_hour
+from phones import normalize_phone, normalize_name
+from profiling import Profiler
+from rate_limit import RateLimiter
+from resilience import CircuitBreaker, CLOSED
+from search import InvertedIndex
 
 app = Flask(__name__)
-csrf = CSRFProtect(app)
 app.config['SECRET_KEY'] = "VeryVeryRandomStringForVeryVerySecurity"
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get("DATABASE_URL")
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['RATELIMIT_ENABLED'] = os.environ.get("RATELIMIT_ENABLED", "1") != "0"
+app.config['RATELIMIT_STORAGE'] = os.environ.get("RATELIMIT_STORAGE", "memory")
+app.config['RATELIMIT_STORAGE_URL'] = os.environ.get("RATELIMIT_STORAGE_URL")
+app.config['RATELIMIT_BEHIND_PROXY'] = "DYNO" in os.environ
+app.config['DEDUP_WINDOW'] = timedelta(minutes=int(os.environ.get("DEDUP_WINDOW_MINUTES", 30)))
+app.config['SEARCH_PER_PAGE'] = 10
+app.config['SEARCH_INDEX_TTL'] = 300
+app.config['LOCALES'] = ("ru", "en")
+app.config['DEFAULT_LOCALE'] = "ru"
+app.config['CATALOG_TTL'] = 300
+app.config['RESPONSE_CACHE_TTL'] = 60
+app.config['RESPONSE_CACHE_MAX_ENTRIES'] = 1000
+app.config['SNAPSHOT_MAX_TEACHERS'] = 1000
+app.config['DB_BREAKER_THRESHOLD'] = int(os.environ.get("DB_BREAKER_THRESHOLD", 5))
+app.config['DB_BREAKER_RESET_TIMEOUT'] = int(os.environ.get("DB_BREAKER_RESET_TIMEOUT", 30))
+app.config['READINESS_STATEMENT_TIMEOUT_MS'] = 1000
+USE_POSTGRES = (app.config['SQLALCHEMY_DATABASE_URI'] or "").startswith("postgres")
+if USE_POSTGRES:
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        "pool_pre_ping": True,
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", 2)),
+        "connect_args": {
+            "connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", 3)),
+            "options": f"-c statement_timeout={int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 5000))}",
+        },
+    }
+app.config['PROFILE_SECRET'] = os.environ.get("PROFILE_SECRET")
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+app.config['PROFILE_MODE'] = os.environ.get("PROFILE_MODE", "sampler")
+app.config['PROFILE_CONTINUOUS'] = os.environ.get("PROFILE_CONTINUOUS", "0") != "0"
+app.config['PROFILE_DIR'] = os.environ.get("PROFILE_DIR", "profiles")
+app.config['PROFILE_MAX_FILES'] = int(os.environ.get("PROFILE_MAX_FILES", 500))
+app.config['PROFILE_MAX_BYTES'] = int(os.environ.get("PROFILE_MAX_BYTES", 200 * 1024 * 1024))
+profiler = Profiler(app)
+# the IP limit runs before CSRFProtect and the phone limit after it
+limiter = RateLimiter(app)
+csrf = CSRFProtect(app)
+limiter.init_phone_check(app)
 
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
+LEGACY_CREATED_AT = datetime(1970, 1, 1)
+db_breaker = CircuitBreaker(app.config['DB_BREAKER_THRESHOLD'], app.config['DB_BREAKER_RESET_TIMEOUT'])
+DB_OUTAGE_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError)
+# SQLSTATE raised by the "bookings_no_overlap" exclusion constraint
+EXCLUSION_VIOLATION = "23P01"
+
+SEARCH_VECTOR_SQL = "setweight(to_tsvector('english', name), 'A') || setweight(to_tsvector('russian', name), 'A') || " \
+                    "setweight(to_tsvector('english', about), 'B') || setweight(to_tsvector('russian', about), 'B')"
 
 teachers_goals_association = db.Table('teachers_goals', db.metadata,
-                                      db.Column('teacher_id', db.Integer, db.ForeignKey('teachers.id'), nullable=False),
-                                      db.Column('goal_id', db.Integer, db.ForeignKey('goals.id'), nullable=False))
+                                      db.Column('teacher_id', db.Integer, db.ForeignKey('teachers.id'), primary_key=True),
+                                      db.Column('goal_id', db.Integer, db.ForeignKey('goals.id'), primary_key=True))
 
 
 class Teacher(db.Model):
@@ -30,12 +89,20 @@ class Teacher(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
     about = db.Column(db.String, nullable=False)
-    rating = db.Column(db.Float, nullable=False)
+    rating = db.Column(db.Numeric(2, 1), nullable=False)
     picture = db.Column(db.String, nullable=False)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Numeric(10, 2), nullable=False)
     goals = db.relationship("Goal", secondary=teachers_goals_association, back_populates="teachers")
-    free = db.Column(JSONB, nullable=False)
+    free = db.Column(JSONB().with_variant(db.JSON, "sqlite"), nullable=False)
+    # SQLite cannot compute a tsvector, there the column stays empty and search uses the in-process index
+    search_vector = db.deferred(db.Column(TSVECTOR().with_variant(db.Text, "sqlite"),
+                                          *([Computed(SEARCH_VECTOR_SQL, persisted=True)] if USE_POSTGRES else [])))
+    timezone = db.Column(db.String, nullable=False, default=DEFAULT_TIMEZONE, server_default=DEFAULT_TIMEZONE)
     bookings = db.relationship("Booking", back_populates="teachers")
+    availability_rules = db.relationship("AvailabilityRule", back_populates="teacher")
+    __table_args__ = (db.Index("ix_teachers_search_vector", "search_vector", postgresql_using="gin"),
+                      db.CheckConstraint("price >= 0", name="ck_teachers_price"),
+                      db.CheckConstraint("rating BETWEEN 0 AND 5", name="ck_teachers_rating"))
 
 
 class Booking(db.Model):
@@ -43,10 +110,35 @@ class Booking(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     client_name = db.Column(db.String, nullable=False)
     client_phone = db.Column(db.String, nullable=False)
-    time = db.Column(db.String, nullable=False)
-    day = db.Column(db.String, nullable=False)
+    client_phone_canonical = db.Column(db.String, nullable=False)
+    time = db.Column(db.Time, nullable=False)
+    day = db.Column(db.SmallInteger, nullable=False)
     teacher_id = db.Column(db.Integer, db.ForeignKey("teachers.id"), nullable=False)
+    starts_at = db.Column(db.DateTime(timezone=True))
+    ends_at = db.Column(db.DateTime(timezone=True))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, server_default=func.now())
     teachers = db.relationship("Teacher", back_populates="bookings")
+    # overlapping bookings are also rejected by the "bookings_no_overlap" exclusion constraint on Postgres
+    __table_args__ = (db.Index("ix_bookings_client_phone_canonical_created_at",
+                               "client_phone_canonical", "created_at"),
+                      db.Index("ix_bookings_teacher_id_starts_at", "teacher_id", "starts_at"),
+                      db.CheckConstraint("starts_at < ends_at", name="ck_bookings_range"),
+                      db.CheckConstraint("day BETWEEN 0 AND 6", name="ck_bookings_day"))
+
+
+class AvailabilityRule(db.Model):
+    __tablename__ = "availability_rules"
+    id = db.Column(db.Integer, primary_key=True)
+    teacher_id = db.Column(db.Integer, db.ForeignKey("teachers.id"), nullable=False)
+    weekday = db.Column(db.SmallInteger, nullable=False)
+    start_time = db.Column(db.Time, nullable=False)
+    duration_minutes = db.Column(db.SmallInteger, nullable=False, default=DEFAULT_DURATION)
+    valid_from = db.Column(db.Date)
+    valid_until = db.Column(db.Date)
+    teacher = db.relationship("Teacher", back_populates="availability_rules")
+    __table_args__ = (db.Index("ix_availability_rules_teacher_id_weekday", "teacher_id", "weekday"),
+                      db.CheckConstraint("weekday BETWEEN 0 AND 6", name="ck_availability_rules_weekday"),
+                      db.CheckConstraint("duration_minutes > 0", name="ck_availability_rules_duration_minutes"))
 
 
 class Request(db.Model):
@@ -56,12 +148,16 @@ class Request(db.Model):
     time = db.Column(db.String, nullable=False)
     client_name = db.Column(db.String, nullable=False)
     client_phone = db.Column(db.String, nullable=False)
+    client_phone_canonical = db.Column(db.String, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, server_default=func.now())
+    __table_args__ = (db.Index("ix_requests_client_phone_canonical_created_at",
+                               "client_phone_canonical", "created_at"),)
 
 
 class Day(db.Model):
     __tablename__ = "days"
     id = db.Column(db.Integer, primary_key=True)
-    key_en = db.Column(db.String, nullable=False)
+    key_en = db.Column(db.String, nullable=False, unique=True)
     value_ru = db.Column(db.String, nullable=False)
     value_en = db.Column(db.String, nullable=False)
 
@@ -69,82 +165,639 @@ class Day(db.Model):
 class Goal(db.Model):
     __tablename__ = "goals"
     id = db.Column(db.Integer, primary_key=True)
-    key_en = db.Column(db.String, nullable=False)
+    key_en = db.Column(db.String, nullable=False, unique=True)
     value_ru = db.Column(db.String, nullable=False)
     icon = db.Column(db.String, nullable=False)
     teachers = db.relationship("Teacher", secondary=teachers_goals_association, back_populates="goals")
 
 
-class BookingForm(FlaskForm):
+class GoalTranslation(db.Model):
+    __tablename__ = "goal_translations"
+    goal_id = db.Column(db.Integer, db.ForeignKey("goals.id"), primary_key=True)
+    locale = db.Column(db.String(8), primary_key=True)
+    value = db.Column(db.String, nullable=False)
+
+
+class DayTranslation(db.Model):
+    __tablename__ = "day_translations"
+    day_id = db.Column(db.Integer, db.ForeignKey("days.id"), primary_key=True)
+    locale = db.Column(db.String(8), primary_key=True)
+    value = db.Column(db.String, nullable=False)
+
+
+class Label(db.Model):
+    __tablename__ = "labels"
+    key = db.Column(db.String, primary_key=True)
+    locale = db.Column(db.String(8), primary_key=True)
+    value = db.Column(db.String, nullable=False)
+
+
+class TeacherStats(db.Model):
+    __tablename__ = "teacher_stats"
+    teacher_id = db.Column(db.Integer, db.ForeignKey("teachers.id"), primary_key=True)
+    bookings_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    free_slots = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    last_booked_at = db.Column(db.DateTime(timezone=True))
+    __table_args__ = (db.Index("ix_teacher_stats_bookings_count", "bookings_count"),)
+
+
+class GoalStats(db.Model):
+    __tablename__ = "goal_stats"
+    goal_id = db.Column(db.Integer, db.ForeignKey("goals.id"), primary_key=True)
+    teachers_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    bookings_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    requests_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
+REQUEST_TIMES = ("1-2", "3-5", "5-7", "7-10")
+SORT_CHOICES = ("random", "by_rating", "expensive_first", "cheap_first", "popular")
+
+
+class PhoneNumber:
+    # a phone without digits would share the empty canonical value with every other such phone
+    def __init__(self, message=None):
+        self.message = message
+
+    def __call__(self, form, field):
+        if not normalize_phone(field.data or ""):
+            raise ValidationError(self.message)
+
+
+class LocalizedForm(FlaskForm):
+    label_prefix = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        localize_form(self, get_locale())
+
+
+class BookingForm(LocalizedForm):
+    label_prefix = "booking"
     weekday = HiddenField()
     time = HiddenField()
     teacher = HiddenField()
-    client_name = StringField("Ваc зовут", [InputRequired(message="Укажите ваше имя")])
-    client_phone = StringField("Ваш телефон", [InputRequired(message="Укажите ваш телефон")])
-
-
-class RequestForm(FlaskForm):
-    goal = RadioField("Какая цель занятий?", choices=[
-        ('travel', 'Для путешествий'),
-        ('study', 'Для учебы'),
-        ('work', 'Для работы'),
-        ('relocate', 'Для переезда'),
-    ])
-    time = RadioField("Сколько времени есть?", choices=[
-        ('1-2', '1-2 часа в неделю'),
-        ('3-5', '3-5 часов в неделю'),
-        ('5-7', '5-7 часов в неделю'),
-        ('7-10', '7-10 часов в неделю')
-    ])
-    client_name = StringField("Ваc зовут", [InputRequired(message="Укажите ваше имя")])
-    client_phone = StringField("Ваш телефон", [InputRequired(message="Укажите ваш телефон")])
-
-
-class SortForm(FlaskForm):
-    sort = SelectField("Сортировать", choices=[
-        ('random', 'В случайном порядке'),
-        ('by_rating', 'Сначала лучшие по рейтингу'),
-        ('expensive_first', 'Сначала дорогие'),
-        ('cheap_first', 'Сначала недорогие'),
-    ])
-
-
-def get_schedule(teacher):
-    teacher_free = json.loads(teacher.free)
-    schedule = {}
-    for free in teacher_free:
-        day_schedule = {}
-        for time in teacher_free[free]:
-            if teacher_free[free][time]:
-                day_schedule.update({time: teacher_free[free][time]})
-        schedule[free] = day_schedule
+    client_name = StringField(validators=[InputRequired()])
+    client_phone = StringField(validators=[InputRequired(), PhoneNumber()])
+
+
+class RequestForm(LocalizedForm):
+    label_prefix = "request"
+    goal = RadioField()
+    time = RadioField()
+    client_name = StringField(validators=[InputRequired()])
+    client_phone = StringField(validators=[InputRequired(), PhoneNumber()])
+
+
+class SortForm(LocalizedForm):
+    label_prefix = "sort"
+    sort = SelectField()
+
+
+class SearchForm(SortForm):
+    label_prefix = "search"
+    q = StringField(validators=[InputRequired()])
+    goal = StringField()
+
+
+SORT_ORDERS = {
+    "by_rating": Teacher.rating.desc(),
+    "expensive_first": Teacher.price.desc(),
+    "cheap_first": Teacher.price,
+    "popular": TeacherStats.bookings_count.desc(),
+}
+
+
+def sort_teachers(query, sort_value):
+    # every teacher has a stats row (import_data and "flask reconcile-stats"), so an inner join
+    # lets "popular" be read straight off ix_teacher_stats_bookings_count
+    if sort_value == "popular":
+        query = query.join(TeacherStats, TeacherStats.teacher_id == Teacher.id)
+    return query.order_by(SORT_ORDERS.get(sort_value, func.random()))
+
+
+def as_utc(value):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def get_booked_ranges(teacher_id, start, end):
+    # SQLite returns naive datetimes, so everything is bound and compared in UTC
+    booked = db.session.query(Booking.starts_at, Booking.ends_at)\
+        .filter(Booking.teacher_id == teacher_id, Booking.starts_at < as_utc(end), Booking.ends_at > as_utc(start))\
+        .all()
+    return [(as_utc(starts_at), as_utc(ends_at)) for starts_at, ends_at in booked]
+
+
+def get_schedule(teacher, hide_booked=True):
+    now = datetime.now(timezone.utc)
+    end = now + timedelta(days=7)
+    booked = []
+    if hide_booked:
+        booked = get_booked_ranges(teacher.id, now, end)
+    schedule = {day: {} for day in WEEKDAYS}
+    for starts_at, ends_at in free_slots(teacher.availability_rules, teacher.timezone, booked, now, end):
+        schedule[WEEKDAYS[starts_at.weekday()]][f"{starts_at.hour}:{starts_at.minute:02d}"] = \
+            (as_utc(starts_at), as_utc(ends_at))
 
     return schedule
 
 
-def get_days():
-    all_days = db.session.query(Day).all()
+catalog_cache = {"catalog": None, "loaded_at": 0}
+response_cache = {}
+
+
+def load_catalog():
+    catalog = {"goals": [], "days": [], "goal_labels": {}, "day_labels": {}, "labels": {}, "teachers": {},
+               "goal_teachers": {}}
+    goal_keys = {}
+    for goal in db.session.query(Goal).order_by(Goal.id):
+        goal_keys[goal.id] = goal.key_en
+        catalog["goals"].append({"id": goal.id, "key_en": goal.key_en, "icon": goal.icon})
+        catalog["goal_labels"].setdefault(app.config['DEFAULT_LOCALE'], {})[goal.key_en] = goal.value_ru
+    day_keys = {}
+    for day in db.session.query(Day).order_by(Day.id):
+        day_keys[day.id] = day.key_en
+        catalog["days"].append({"key_en": day.key_en, "slug": day.value_en})
+        catalog["day_labels"].setdefault(app.config['DEFAULT_LOCALE'], {})[day.key_en] = day.value_ru
+    for translation in db.session.query(GoalTranslation):
+        catalog["goal_labels"].setdefault(translation.locale, {})[goal_keys[translation.goal_id]] = translation.value
+    for translation in db.session.query(DayTranslation):
+        catalog["day_labels"].setdefault(translation.locale, {})[day_keys[translation.day_id]] = translation.value
+    for label in db.session.query(Label):
+        catalog["labels"].setdefault(label.locale, {})[label.key] = label.value
+
+    teachers = db.session.query(Teacher.id, Teacher.name, Teacher.about, Teacher.rating, Teacher.picture,
+                                Teacher.price, TeacherStats.bookings_count)\
+        .outerjoin(TeacherStats, TeacherStats.teacher_id == Teacher.id)\
+        .order_by(Teacher.rating.desc())\
+        .limit(app.config['SNAPSHOT_MAX_TEACHERS'])
+    for row in teachers:
+        catalog["teachers"][row.id] = dict(row._asdict(), bookings_count=row.bookings_count or 0, goals=[])
+    for teacher_id, goal_id in db.session.query(teachers_goals_association.c.teacher_id,
+                                                teachers_goals_association.c.goal_id):
+        if teacher_id in catalog["teachers"]:
+            catalog["teachers"][teacher_id]["goals"].append(goal_keys[goal_id])
+            catalog["goal_teachers"].setdefault(goal_keys[goal_id], []).append(teacher_id)
+    return catalog
+
+
+def get_catalog():
+    catalog = catalog_cache["catalog"]
+    if catalog is not None and time.monotonic() - catalog_cache["loaded_at"] <= app.config['CATALOG_TTL']:
+        return catalog
+    # fallbacks render because the database is failing and unguarded pages only reload while the breaker
+    # is closed, so neither waits on a connect timeout; guarded views reload under their own probe
+    guard = g.get("db_guard")
+    if guard == "fallback" or guard is None and db_breaker.state != CLOSED:
+        if catalog is None:
+            abort(503)
+        return catalog
+    try:
+        catalog_cache["catalog"] = load_catalog()
+    except DB_OUTAGE_ERRORS:
+        if guard == "view":
+            raise
+        rollback_quietly()
+        db_breaker.record_failure()
+        if catalog is None:
+            raise
+    catalog_cache["loaded_at"] = time.monotonic()
+    return catalog_cache["catalog"]
+
+
+def rollback_quietly():
+    try:
+        db.session.rollback()
+    except DB_OUTAGE_ERRORS:
+        pass
+
+
+def try_later(*_, **__):
+    return message("errors.try_later", "Сервис временно недоступен, попробуйте позже"), 503, \
+        {"Retry-After": str(db_breaker.retry_after())}
+
+
+def db_guarded(fallback=try_later):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not db_breaker.allow():
+                g.db_guard = "fallback"
+                return fallback(*args, **kwargs)
+            g.db_guard = "view"
+            try:
+                response = view(*args, **kwargs)
+            except DB_OUTAGE_ERRORS:
+                rollback_quietly()
+                db_breaker.record_failure()
+                g.db_guard = "fallback"
+                return fallback(*args, **kwargs)
+            except Exception:
+                # abort(404) and other non-outage errors still mean the database answered the probe
+                db_breaker.record_success()
+                raise
+            db_breaker.record_success()
+            return response
+        return wrapper
+    return decorator
+
+
+def get_snapshot():
+    catalog = catalog_cache["catalog"]
+    if catalog is None:
+        abort(503)
+    return catalog
+
+
+def sort_snapshot(teachers, sort_value):
+    if sort_value == "by_rating":
+        return sorted(teachers, key=lambda teacher: teacher["rating"], reverse=True)
+    if sort_value == "expensive_first":
+        return sorted(teachers, key=lambda teacher: teacher["price"], reverse=True)
+    if sort_value == "cheap_first":
+        return sorted(teachers, key=lambda teacher: teacher["price"])
+    if sort_value == "popular":
+        return sorted(teachers, key=lambda teacher: teacher["bookings_count"], reverse=True)
+    return random.sample(teachers, len(teachers))
+
+
+def translate(section, key, locale=None, default=None):
+    translations = get_catalog()[section]
+    for candidate in (locale or get_locale(), app.config['DEFAULT_LOCALE']):
+        value = translations.get(candidate, {}).get(key)
+        if value is not None:
+            return value
+    return default
+
+
+def message(key, default):
+    # error responses can be produced before any catalog was loaded
+    if catalog_cache["catalog"] is None:
+        return default
+    return translate("labels", key, default=default)
+    return key if default is None else default
+
+
+def get_locale():
+    if "locale" not in g:
+        locale = request.args.get("lang")
+        if locale in app.config['LOCALES']:
+            session['locale'] = locale
+        locale = session.get('locale')
+        if locale not in app.config['LOCALES']:
+            locale = request.accept_languages.best_match(app.config['LOCALES'], app.config['DEFAULT_LOCALE'])
+        g.locale = locale
+    return g.locale
+
+
+def get_choices(field, locale):
+    if field.name == "goal":
+        return [(goal["key_en"], translate("goal_labels", goal["key_en"], locale)) for goal in get_catalog()["goals"]]
+    keys = REQUEST_TIMES if field.name == "time" else SORT_CHOICES
+    return [(key, translate("labels", f"{field.name}.{key}", locale)) for key in keys]
+
+
+def localize_form(form, locale):
+    for field in form:
+        if field.type in ("HiddenField", "CSRFTokenField"):
+            continue
+        field.label.text = translate("labels", f"{form.label_prefix}.{field.name}", locale, field.label.text)
+        if field.type in ("RadioField", "SelectField"):
+            field.choices = get_choices(field, locale)
+        field.validators = [localize_validator(field.name, validator, locale) for validator in field.validators]
+
+
+def localize_validator(field_name, validator, locale):
+    if isinstance(validator, InputRequired):
+        return InputRequired(message=translate("labels", f"{field_name}.required", locale))
+    if isinstance(validator, PhoneNumber):
+        return PhoneNumber(message=translate("labels", f"{field_name}.invalid", locale))
+    return validator
+
+
+def get_days(locale=None):
     days = {}
-    for day in all_days:
-        days[day.key_en] = [day.value_ru, day.value_en]
+    for day in get_catalog()["days"]:
+        days[day["key_en"]] = [translate("day_labels", day["key_en"], locale), day["slug"]]
 
     return days
 
 
+def cached_render(render):
+    key = (request.full_path, get_locale())
+    cached = response_cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    body = render()
+    if len(response_cache) >= app.config['RESPONSE_CACHE_MAX_ENTRIES']:
+        response_cache.clear()
+    response_cache[key] = (time.monotonic() + app.config['RESPONSE_CACHE_TTL'], body)
+    return body
+
+
+def seed_translations():
+    from data import goal_translations, day_translations, labels
+
+    goal_ids = dict(db.session.query(Goal.key_en, Goal.id))
+    for key, values in goal_translations.items():
+        if key in goal_ids:
+            for locale, value in values.items():
+                db.session.merge(GoalTranslation(goal_id=goal_ids[key], locale=locale, value=value))
+    day_ids = dict(db.session.query(Day.key_en, Day.id))
+    for key, values in day_translations.items():
+        if key in day_ids:
+            for locale, value in values.items():
+                db.session.merge(DayTranslation(day_id=day_ids[key], locale=locale, value=value))
+    for locale, values in labels.items():
+        for key, value in values.items():
+            db.session.merge(Label(key=key, locale=locale, value=value))
+    db.session.commit()
+    catalog_cache["catalog"] = None
+    response_cache.clear()
+
+
+@app.cli.command("seed-translations")
+def seed_translations_command():
+    seed_translations()
+
+
+@app.context_processor
+def inject_locale():
+    return {"locale": get_locale(),
+            "locales": app.config['LOCALES'],
+            "goal_label": lambda key: translate("goal_labels", key),
+            "label": lambda key: translate("labels", key, default=key)}
+
+
+search_index = {"index": None, "built_at": 0}
+
+
+def get_search_index():
+    if search_index["index"] is None or time.monotonic() - search_index["built_at"] > app.config['SEARCH_INDEX_TTL']:
+        index = InvertedIndex()
+        for teacher_id, name, about in db.session.query(Teacher.id, Teacher.name, Teacher.about):
+            index.add(teacher_id, name, about)
+        search_index["index"] = index
+        search_index["built_at"] = time.monotonic()
+    return search_index["index"]
+
+
+def search_teachers(q, goal, sort_value, page):
+    per_page = app.config['SEARCH_PER_PAGE']
+    query = db.session.query(Teacher)
+    if goal:
+        query = query.join(teachers_goals_association, Goal).filter(Goal.key_en == goal)
+
+    if db.engine.dialect.name == "postgresql":
+        ts_query = func.plainto_tsquery('english', q).op('||')(func.plainto_tsquery('russian', q))
+        rank = func.ts_rank_cd(Teacher.search_vector, ts_query)
+        query = query.filter(Teacher.search_vector.op('@@')(ts_query))
+        if sort_value in SORT_ORDERS:
+            query = sort_teachers(query, sort_value).order_by(rank.desc())
+        else:
+            query = query.order_by(rank.desc(), Teacher.id)
+        return query.paginate(page, per_page, error_out=False)
+
+    scores = get_search_index().search(q)
+    if not scores:
+        return Pagination(None, page, per_page, 0, [])
+    query = query.filter(Teacher.id.in_(scores))
+    if sort_value in SORT_ORDERS:
+        teachers = sort_teachers(query, sort_value).all()
+    else:
+        teachers = sorted(query.all(), key=lambda teacher: (-scores[teacher.id], teacher.id))
+    start = (page - 1) * per_page
+    return Pagination(None, page, per_page, len(teachers), teachers[start:start + per_page])
+
+
+def find_recent_duplicate(model, client_phone_canonical, **fields):
+    since = datetime.utcnow() - app.config['DEDUP_WINDOW']
+    return db.session.query(model)\
+        .filter(model.client_phone_canonical == client_phone_canonical, model.created_at >= since)\
+        .filter_by(**fields)\
+        .order_by(model.created_at.desc())\
+        .first()
+
+
+def upsert(model, values, updates):
+    if USE_POSTGRES:
+        statement = pg_insert(model.__table__).values(**values)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[column.name for column in model.__table__.primary_key.columns], set_=updates))
+        return
+    # SQLite serialises writers, so the update-then-insert fallback cannot race there
+    keys = {column.name: values[column.name] for column in model.__table__.primary_key.columns}
+    if not db.session.query(model).filter_by(**keys).update(updates, synchronize_session=False):
+        db.session.add(model(**values))
+
+
+def increment_stats(model, key_name, key, **increments):
+    upsert(model, {key_name: key, **increments},
+           {name: getattr(model, name) + delta for name, delta in increments.items()})
+
+
+def record_booking_stats(teacher_id, booked_at):
+    upsert(TeacherStats, {"teacher_id": teacher_id, "bookings_count": 1, "last_booked_at": booked_at}, {
+        "bookings_count": TeacherStats.bookings_count + 1,
+        "free_slots": db.case([(TeacherStats.free_slots > 0, TeacherStats.free_slots - 1)], else_=0),
+        "last_booked_at": booked_at,
+    })
+
+    # a fixed lock order keeps concurrent bookings for teachers with shared goals from deadlocking
+    goal_ids = db.session.query(teachers_goals_association.c.goal_id)\
+        .filter(teachers_goals_association.c.teacher_id == teacher_id)\
+        .order_by(teachers_goals_association.c.goal_id)
+    for goal_id, in goal_ids:
+        increment_stats(GoalStats, "goal_id", goal_id, bookings_count=1)
+
+
+def record_request_stats(goal):
+    goal_id = db.session.query(Goal.id).filter(Goal.key_en == goal).scalar()
+    if goal_id is not None:
+        increment_stats(GoalStats, "goal_id", goal_id, requests_count=1)
+
+
+def count_free_slots(teacher, rules, booked, now):
+    start, end = rolling_window(now, now + timedelta(days=ROLLING_WINDOW_DAYS), now)
+    return sum(1 for _ in free_slots(rules, teacher.timezone, booked, start, end))
+
+
+def reconcile_teacher_stats(teacher_ids, now):
+    teachers = db.session.query(Teacher).filter(Teacher.id.in_(teacher_ids)).all()
+    counts = dict(db.session.query(Booking.teacher_id, func.count(Booking.id))
+                  .filter(Booking.teacher_id.in_(teacher_ids)).group_by(Booking.teacher_id))
+    last_booked = dict(db.session.query(Booking.teacher_id, func.max(Booking.created_at))
+                       .filter(Booking.teacher_id.in_(teacher_ids), Booking.created_at > LEGACY_CREATED_AT)
+                       .group_by(Booking.teacher_id))
+    rules = {}
+    for rule in db.session.query(AvailabilityRule).filter(AvailabilityRule.teacher_id.in_(teacher_ids)):
+        rules.setdefault(rule.teacher_id, []).append(rule)
+    booked = {}
+    window_end = now + timedelta(days=ROLLING_WINDOW_DAYS)
+    for teacher_id, starts_at, ends_at in db.session.query(Booking.teacher_id, Booking.starts_at, Booking.ends_at)\
+            .filter(Booking.teacher_id.in_(teacher_ids), Booking.starts_at < window_end, Booking.ends_at > now):
+        booked.setdefault(teacher_id, []).append((as_utc(starts_at), as_utc(ends_at)))
+
+    for teacher in teachers:
+        db.session.merge(TeacherStats(teacher_id=teacher.id,
+                                      bookings_count=counts.get(teacher.id, 0),
+                                      free_slots=count_free_slots(teacher, rules.get(teacher.id, []),
+                                                                  booked.get(teacher.id, []), now),
+                                      last_booked_at=last_booked[teacher.id].replace(tzinfo=timezone.utc)
+                                      if teacher.id in last_booked else None))
+
+
+def reconcile_goal_stats():
+    teachers_counts = dict(db.session.query(teachers_goals_association.c.goal_id, func.count())
+                           .group_by(teachers_goals_association.c.goal_id))
+    bookings_counts = dict(db.session.query(teachers_goals_association.c.goal_id, func.count(Booking.id))
+                           .join(Booking, Booking.teacher_id == teachers_goals_association.c.teacher_id)
+                           .group_by(teachers_goals_association.c.goal_id))
+    requests_counts = dict(db.session.query(Goal.id, func.count(Request.id))
+                           .join(Request, Request.goal == Goal.key_en)
+                           .group_by(Goal.id))
+    for goal_id, in db.session.query(Goal.id):
+        db.session.merge(GoalStats(goal_id=goal_id,
+                                   teachers_count=teachers_counts.get(goal_id, 0),
+                                   bookings_count=bookings_counts.get(goal_id, 0),
+                                   requests_count=requests_counts.get(goal_id, 0)))
+
+
+def reconcile_stats(batch_size=500):
+    now = datetime.now(timezone.utc)
+    last_id = -1
+    while True:
+        teacher_ids = [teacher_id for teacher_id, in db.session.query(Teacher.id)
+                       .filter(Teacher.id > last_id).order_by(Teacher.id).limit(batch_size)]
+        if not teacher_ids:
+            break
+        reconcile_teacher_stats(teacher_ids, now)
+        db.session.commit()
+        last_id = teacher_ids[-1]
+
+    reconcile_goal_stats()
+    db.session.commit()
+
+
+@app.cli.command("reconcile-stats")
+@click.option("--batch-size", default=500, help="Teachers recomputed per transaction.")
+def reconcile_stats_command(batch_size):
+    reconcile_stats(batch_size)
+
+
+def render_main_snapshot():
+    snapshot = get_snapshot()
+    teachers = list(snapshot["teachers"].values())
+    return render_template("index.html", goals=snapshot["goals"],
+                           teachers=random.sample(teachers, min(6, len(teachers))))
+
+
+def render_all_snapshot():
+    form = SortForm(request.args, meta={'csrf': False})
+    teachers = sort_snapshot(list(get_snapshot()["teachers"].values()), request.args.get("sort"))
+    return render_template("all.html", form=form,
+                           teachers=teachers)
+
+
+def render_goals_snapshot(goal):
+    snapshot = get_snapshot()
+    goals = next((item for item in snapshot["goals"] if item["key_en"] == goal), None)
+    if goals is None:
+        abort(404)
+    teachers = [snapshot["teachers"][teacher_id] for teacher_id in snapshot["goal_teachers"].get(goal, [])]
+    return render_template("goal.html", goal=goal,
+                           icon=goals["icon"],
+                           goal_name=translate("goal_labels", goal).lower(),
+                           teachers=teachers)
+
+
+def render_profiles_snapshot(teacher_id):
+    teacher = get_snapshot()["teachers"].get(teacher_id)
+    if teacher is None:
+        return try_later()
+    goals = [{"key_en": key} for key in teacher["goals"]]
+    return render_template("profile.html", teacher=teacher,
+                           goals=goals,
+                           days=get_days(),
+                           schedule={})
+
+
 @app.errorhandler(404)
 def render_not_found(_):
-    return "Ничего не нашлось! Вот неудача, отправляйтесь на главную!", 404
+    return message("errors.not_found", "Ничего не нашлось! Вот неудача, отправляйтесь на главную!"), 404
+
+
+@app.errorhandler(503)
+def render_unavailable(_):
+    return try_later()
+
+
+@app.route("/healthz")
+def render_health():
+    return jsonify(status="ok", db_breaker=db_breaker.state)
+
+
+@app.route("/readyz")
+def render_ready():
+    pool = db.engine.pool.status()
+    if db_breaker.is_open():
+        return jsonify(status="unavailable", db_breaker=db_breaker.state, pool=pool), 503
+
+    try:
+        with db.engine.connect() as connection:
+            with connection.begin():
+                if db.engine.dialect.name == "postgresql":
+                    connection.execute(f"SET LOCAL statement_timeout = "
+                                       f"{int(app.config['READINESS_STATEMENT_TIMEOUT_MS'])}")
+                connection.execute("SELECT 1")
+    except DB_OUTAGE_ERRORS:
+        db_breaker.record_failure()
+        return jsonify(status="unavailable", db_breaker=db_breaker.state, pool=pool), 503
+
+    db_breaker.record_success()
+    return jsonify(status="ok", db_breaker=db_breaker.state, pool=db.engine.pool.status())
+
+
+@app.route("/ratelimit/stats/")
+def render_ratelimit_stats():
+    return jsonify(rejected=limiter.stats())
+
+
+@app.route("/stats/")
+@db_guarded()
+def render_stats():
+    popular = db.session.query(Teacher.id, Teacher.name, TeacherStats.bookings_count, TeacherStats.free_slots,
+                               TeacherStats.last_booked_at)\
+        .join(TeacherStats, TeacherStats.teacher_id == Teacher.id)\
+        .order_by(TeacherStats.bookings_count.desc())\
+        .limit(10)
+    goals = db.session.query(Goal.key_en, GoalStats.teachers_count, GoalStats.bookings_count, GoalStats.requests_count)\
+        .join(GoalStats, GoalStats.goal_id == Goal.id)
+    return jsonify(teachers=[{"id": teacher_id,
+                              "name": name,
+                              "bookings": bookings_count,
+                              "free_slots": free_slots_count,
+                              "utilisation": bookings_count / (bookings_count + free_slots_count)
+                              if bookings_count + free_slots_count else 0,
+                              "last_booked_at": last_booked_at.isoformat() if last_booked_at else None}
+                             for teacher_id, name, bookings_count, free_slots_count, last_booked_at in popular],
+                   goals={key_en: {"teachers": teachers_count, "bookings": bookings_count, "requests": requests_count}
+                          for key_en, teachers_count, bookings_count, requests_count in goals})
 
 
 @app.route("/")
+@db_guarded(render_main_snapshot)
 def render_main():
-    goals = db.session.query(Goal).all()
+    goals = get_catalog()["goals"]
     teachers = db.session.query(Teacher).order_by(func.random()).limit(6)
     return render_template("index.html", goals=goals,
                            teachers=teachers)
 
 
 @app.route("/all/")
+@db_guarded(render_all_snapshot)
 def render_all():
     form = SortForm(request.args, meta={'csrf': False})
 
@@ -152,41 +805,47 @@ def render_all():
         return redirect(url_for("render_all"))
 
     sort_value = request.args.get("sort")
-    if not sort_value or sort_value == "random":
-        teachers = db.session.query(Teacher).order_by(func.random()).all()
+    if sort_value not in SORT_ORDERS:
+        teachers = sort_teachers(db.session.query(Teacher), sort_value).all()
         return render_template("all.html", form=form,
                                teachers=teachers)
 
-    elif sort_value == "by_rating":
-        teachers = db.session.query(Teacher).order_by(Teacher.rating.desc()).all()
-        return render_template("all.html", form=form,
-                               teachers=teachers)
+    return cached_render(lambda: render_template("all.html", form=form,
+                                                 teachers=sort_teachers(db.session.query(Teacher), sort_value).all()))
 
-    elif sort_value == "expensive_first":
-        teachers = db.session.query(Teacher).order_by(Teacher.price.desc()).all()
-        return render_template("all.html", form=form,
-                               teachers=teachers)
 
-    elif sort_value == "cheap_first":
-        teachers = db.session.query(Teacher).order_by(Teacher.price).all()
-        return render_template("all.html", form=form,
-                               teachers=teachers)
+@app.route("/search/")
+@db_guarded()
+def render_search():
+    form = SearchForm(request.args, sort="random", meta={'csrf': False})
+    if not form.validate():
+        return render_template("search.html", form=form,
+                               pagination=None)
+
+    page = request.args.get("page", 1, type=int)
+    pagination = search_teachers(form.q.data, form.goal.data, form.sort.data, max(page, 1))
+    return render_template("search.html", form=form,
+                           pagination=pagination)
 
 
 @app.route("/goals/<goal>/")
+@db_guarded(render_goals_snapshot)
 def render_goals(goal):
-    goals = db.session.query(Goal).filter(Goal.key_en == goal).first()
-    goal_name = f"{goals.value_ru[0].lower()}{goals.value_ru[1:].lower()}"
-    icon = goals.icon
-    teachers = db.session.query(Teacher).join(teachers_goals_association, Goal)\
-        .filter(Goal.key_en == goal).all()
-    return render_template("goal.html", goal=goal,
-                           icon=icon,
-                           goal_name=goal_name,
-                           teachers=teachers)
+    goals = next((item for item in get_catalog()["goals"] if item["key_en"] == goal), None)
+    if goals is None:
+        abort(404)
+    goal_name = translate("goal_labels", goal).lower()
+    icon = goals["icon"]
+    return cached_render(lambda: render_template("goal.html", goal=goal,
+                                                 icon=icon,
+                                                 goal_name=goal_name,
+                                                 teachers=db.session.query(Teacher)
+                                                 .join(teachers_goals_association, Goal)
+                                                 .filter(Goal.key_en == goal).all()))
 
 
 @app.route("/profiles/<int:teacher_id>/")
+@db_guarded(render_profiles_snapshot)
 def render_profiles(teacher_id):
     teacher = db.session.query(Teacher).get_or_404(teacher_id)
     goals = teacher.goals
@@ -198,7 +857,28 @@ def render_profiles(teacher_id):
                            schedule=schedule)
 
 
+@app.route("/profiles/<int:teacher_id>/calendar/")
+@db_guarded()
+def render_calendar(teacher_id):
+    teacher = db.session.query(Teacher).get_or_404(teacher_id)
+    try:
+        start, end = month_bounds(request.args.get("month", datetime.now(timezone.utc).strftime("%Y-%m")),
+                                  teacher.timezone)
+    except ValueError:
+        abort(404)
+
+    start, end = rolling_window(start, end)
+    slots = []
+    if start < end:
+        rules = db.session.query(AvailabilityRule).filter(AvailabilityRule.teacher_id == teacher_id).all()
+        booked = get_booked_ranges(teacher_id, start, end)
+        slots = [{"starts_at": starts_at.isoformat(), "ends_at": ends_at.isoformat()}
+                 for starts_at, ends_at in free_slots(rules, teacher.timezone, booked, start, end)]
+    return jsonify(teacher_id=teacher_id, timezone=teacher.timezone, slots=slots)
+
+
 @app.route("/request/", methods=["GET", "POST"])
+@db_guarded()
 def render_request():
     form = RequestForm(goal="travel", time="5-7")
     if not form.validate_on_submit():
@@ -215,11 +895,22 @@ def render_request():
         "client_phone": form.client_phone.data
     }
 
-    rec = Request(goal=session['request']['goal'],
-                  time=session['request']['time'],
-                  client_name=session['request']['client_name'],
-                  client_phone=session['request']['client_phone'])
-    db.session.add(rec)
+    client_name = normalize_name(session['request']['client_name'])
+    client_phone_canonical = normalize_phone(session['request']['client_phone'])
+    rec = find_recent_duplicate(Request, client_phone_canonical,
+                                goal=session['request']['goal'],
+                                time=session['request']['time'])
+    if rec:
+        rec.client_name = client_name
+        rec.client_phone = session['request']['client_phone']
+    else:
+        rec = Request(goal=session['request']['goal'],
+                      time=session['request']['time'],
+                      client_name=client_name,
+                      client_phone=session['request']['client_phone'],
+                      client_phone_canonical=client_phone_canonical)
+        db.session.add(rec)
+        record_request_stats(rec.goal)
     db.session.commit()
     return redirect(url_for("render_request_done"))
 
@@ -233,13 +924,17 @@ def render_request_done():
 
 
 @app.route("/booking/<int:teacher_id>/<day>/<time>/", methods=["GET", "POST"])
+@db_guarded()
 def render_booking(teacher_id, day, time):
     teacher = db.session.query(Teacher).get_or_404(teacher_id)
-    schedule = get_schedule(teacher)
+    schedule = get_schedule(teacher, hide_booked=False)
     days = get_days()
     day = day[:3]
+    # slots are keyed "H:MM"; bare hours are still accepted from older links
+    if ":" not in time:
+        time = f"{time}:00"
 
-    if not schedule.get(day) or f"{time}:00" not in schedule.get(day):
+    if not schedule.get(day) or time not in schedule.get(day):
         abort(404)
 
     form = BookingForm()
@@ -258,13 +953,39 @@ def render_booking(teacher_id, day, time):
         "client_phone": form.client_phone.data
     }
 
-    rec = Booking(client_name=session['booking']['client_name'],
+    client_name = normalize_name(session['booking']['client_name'])
+    client_phone_canonical = normalize_phone(session['booking']['client_phone'])
+    rec = find_recent_duplicate(Booking, client_phone_canonical,
+                                time=parse_hour(time),
+                                day=WEEKDAYS.index(day),
+                                teacher_id=teacher.id)
+    if rec:
+        rec.client_name = client_name
+        rec.client_phone = session['booking']['client_phone']
+        db.session.commit()
+        return redirect(url_for("render_booking_done"))
+
+    starts_at, ends_at = schedule[day][time]
+    if get_booked_ranges(teacher.id, starts_at, ends_at):
+        return message("errors.slot_taken", "Это время уже занято, выберите другое"), 409
+
+    rec = Booking(client_name=client_name,
                   client_phone=session['booking']['client_phone'],
-                  time=session['booking']['time'],
-                  day=session['booking']['day'],
-                  teacher_id=session['booking']['teacher_id'])
+                  client_phone_canonical=client_phone_canonical,
+                  time=parse_hour(time),
+                  day=WEEKDAYS.index(day),
+                  teacher_id=teacher.id,
+                  starts_at=starts_at,
+                  ends_at=ends_at)
     db.session.add(rec)
-    db.session.commit()
+    try:
+        record_booking_stats(teacher.id, datetime.now(timezone.utc))
+        db.session.commit()
+    except IntegrityError as error:
+        db.session.rollback()
+        if getattr(error.orig, "pgcode", None) != EXCLUSION_VIOLATION:
+            raise
+        return message("errors.slot_taken", "Это время уже занято, выберите другое"), 409
     return redirect(url_for("render_booking_done"))
 
 
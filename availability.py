@@ -0,0 +1,76 @@
+from datetime import datetime, time, timedelta
+
+from dateutil import tz
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DEFAULT_TIMEZONE = "Europe/Moscow"
+DEFAULT_DURATION = 60
+ROLLING_WINDOW_DAYS = 62
+
+
+def get_tz(name):
+    return tz.gettz(name or DEFAULT_TIMEZONE) or tz.gettz(DEFAULT_TIMEZONE)
+
+
+def parse_hour(value):
+    hours, _, minutes = value.partition(":")
+    return time(int(hours), int(minutes or 0))
+
+
+def rules_from_free(free):
+    rules = []
+    for day_key, hours in free.items():
+        for hour, is_free in hours.items():
+            if is_free:
+                rules.append((WEEKDAYS.index(day_key), parse_hour(hour)))
+    return sorted(rules)
+
+
+def rolling_window(start, end, now=None):
+    now = now or datetime.now(tz.UTC)
+    return max(start, now), min(end, now + timedelta(days=ROLLING_WINDOW_DAYS))
+
+
+def month_bounds(month, tz_name):
+    zone = get_tz(tz_name)
+    year, month = (int(part) for part in month.split("-"))
+    start = datetime(year, month, 1, tzinfo=zone)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=zone)
+    return start, end
+
+
+def expand_rules(rules, tz_name, start, end):
+    zone = get_tz(tz_name)
+    by_weekday = [[] for _ in WEEKDAYS]
+    for rule in rules:
+        by_weekday[rule.weekday].append(rule)
+
+    day = start.astimezone(zone).date()
+    last_day = end.astimezone(zone).date()
+    while day <= last_day:
+        for rule in sorted(by_weekday[day.weekday()], key=lambda item: item.start_time):
+            if rule.valid_from and day < rule.valid_from or rule.valid_until and day > rule.valid_until:
+                continue
+            starts_at = datetime.combine(day, rule.start_time, tzinfo=zone)
+            ends_at = starts_at + timedelta(minutes=rule.duration_minutes)
+            if starts_at >= start and ends_at <= end:
+                yield starts_at, ends_at
+        day += timedelta(days=1)
+
+
+def free_slots(rules, tz_name, booked, start, end):
+    booked = sorted(booked)
+    position = 0
+    for starts_at, ends_at in expand_rules(rules, tz_name, start, end):
+        while position < len(booked) and booked[position][1] <= starts_at:
+            position += 1
+        overlaps = False
+        for booked_start, booked_end in booked[position:]:
+            if booked_start >= ends_at:
+                break
+            if booked_end > starts_at:
+                overlaps = True
+                break
+        if not overlaps:
+            yield starts_at, ends_at
+
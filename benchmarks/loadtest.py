@@ -0,0 +1,277 @@
+import argparse
+import html
+import json
+import random
+import re
+import statistics
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode, urljoin
+from urllib.request import build_opener, HTTPCookieProcessor
+
+INPUT_RE = re.compile(r"<input[^>]*>")
+ATTR_RE = re.compile(r'(\w+)="([^"]*)"')
+PROFILE_LINK_RE = re.compile(r'href="(/profiles/\d+/)"')
+BOOKING_LINK_RE = re.compile(r'href="(/booking/\d+/\w+/[\d:]+/)"')
+DEFAULT_MIX = "browse=50,profile=30,booking=15,request=5"
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def parse_inputs(page):
+    inputs = {}
+    radios = defaultdict(list)
+    for tag in INPUT_RE.findall(page):
+        attrs = {name: html.unescape(value) for name, value in ATTR_RE.findall(tag)}
+        if "name" not in attrs:
+            continue
+        if attrs.get("type") == "radio":
+            radios[attrs["name"]].append(attrs.get("value", ""))
+        else:
+            inputs[attrs["name"]] = attrs.get("value", "")
+    return inputs, radios
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.conflicts = 0
+        self.rate_limited = 0
+        self.funnels = defaultdict(lambda: {"started": 0, "completed": 0})
+
+    def record(self, step, status, elapsed):
+        with self.lock:
+            self.latencies[step].append(elapsed * 1000)
+            self.statuses[step][status] += 1
+            if status == 409:
+                self.conflicts += 1
+            elif status == 429:
+                self.rate_limited += 1
+            elif status is None or status >= 400:
+                self.errors[step] += 1
+
+    def funnel(self, scenario, completed):
+        with self.lock:
+            self.funnels[scenario]["completed" if completed else "started"] += 1
+
+    def report(self, elapsed, config):
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        total = len(all_latencies)
+        errors = sum(self.errors.values())
+        steps = {}
+        for step, values in sorted(self.latencies.items()):
+            steps[step] = {
+                "requests": len(values),
+                "errors": self.errors[step],
+                "statuses": {str(status): count for status, count in self.statuses[step].items()},
+                "latency_ms": summarize(values),
+            }
+        report = {
+            "config": config,
+            "duration_s": round(elapsed, 3),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 3) if elapsed else 0,
+            "error_rate": round(errors / total, 5) if total else 0,
+            "booking_conflicts": self.conflicts,
+            "rate_limited": self.rate_limited,
+            "latency_ms": summarize(all_latencies),
+            "funnels": dict(self.funnels),
+            "steps": steps,
+        }
+        if config.get("slo_p99_ms") is not None and total:
+            report["slo_met"] = report["latency_ms"]["p99"] <= config["slo_p99_ms"]
+        return report
+
+
+def summarize(values):
+    if not values:
+        return {}
+    return {
+        "mean": round(statistics.mean(values), 3),
+        "p50": round(percentile(values, 50), 3),
+        "p90": round(percentile(values, 90), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3),
+    }
+
+
+class VirtualUser:
+    def __init__(self, base_url, stats, rng, timeout):
+        self.base_url = base_url
+        self.stats = stats
+        self.rng = rng
+        self.timeout = timeout
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()))
+        self.phone = f"+79{rng.randint(0, 999999999):09d}"
+
+    def fetch(self, step, path, data=None):
+        url = urljoin(self.base_url, path)
+        body = urlencode(data).encode() if data is not None else None
+        start = time.perf_counter()
+        try:
+            with self.opener.open(url, body, timeout=self.timeout) as response:
+                page = response.read().decode("utf-8", "replace")
+                status = response.status
+        except HTTPError as error:
+            page = error.read().decode("utf-8", "replace")
+            status = error.code
+        except (URLError, OSError):
+            page, status = "", None
+        self.stats.record(step, status, time.perf_counter() - start)
+        return status, page
+
+    def pick(self, pattern, page):
+        links = pattern.findall(page)
+        return self.rng.choice(links) if links else None
+
+    def browse(self):
+        self.fetch("main", "/")
+        sort = self.rng.choice(["random", "by_rating", "expensive_first", "cheap_first", "popular"])
+        status, _ = self.fetch("all", f"/all/?sort={sort}")
+        return status == 200
+
+    def open_profile(self):
+        _, page = self.fetch("all", "/all/")
+        link = self.pick(PROFILE_LINK_RE, page)
+        if not link:
+            return None
+        status, page = self.fetch("profile", link)
+        return page if status == 200 else None
+
+    def profile(self):
+        return self.open_profile() is not None
+
+    def booking(self):
+        page = self.open_profile()
+        link = page and self.pick(BOOKING_LINK_RE, page)
+        if not link:
+            return False
+        status, page = self.fetch("booking_form", link)
+        if status != 200:
+            return False
+        inputs, _ = parse_inputs(page)
+        inputs.update(client_name="Load Test", client_phone=self.phone)
+        status, _ = self.fetch("booking_submit", link, inputs)
+        return status == 200
+
+    def request(self):
+        status, page = self.fetch("request_form", "/request/")
+        if status != 200:
+            return False
+        inputs, radios = parse_inputs(page)
+        for name, values in radios.items():
+            inputs[name] = self.rng.choice(values)
+        inputs.update(client_name="Load Test", client_phone=self.phone)
+        status, _ = self.fetch("request_submit", "/request/", inputs)
+        return status == 200
+
+
+SCENARIOS = {
+    "browse": VirtualUser.browse,
+    "profile": VirtualUser.profile,
+    "booking": VirtualUser.booking,
+    "request": VirtualUser.request,
+}
+
+
+def run_user(user, mix, deadline, think_time):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.monotonic() < deadline:
+        scenario = user.rng.choices(names, weights)[0]
+        user.stats.funnel(scenario, completed=False)
+        if SCENARIOS[scenario](user):
+            user.stats.funnel(scenario, completed=True)
+        if think_time:
+            time.sleep(user.rng.uniform(0, think_time * 2))
+
+
+def wait_for_server(base_url, timeout):
+    deadline = time.monotonic() + timeout
+    opener = build_opener()
+    while time.monotonic() < deadline:
+        try:
+            opener.open(base_url, timeout=1).close()
+            return
+        except HTTPError:
+            return
+        except (URLError, OSError):
+            time.sleep(0.2)
+    raise SystemExit(f"server at {base_url} did not come up in {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the browse -> profile -> booking funnel")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000/")
+    parser.add_argument("--users", type=int, default=20, help="peak number of concurrent virtual users")
+    parser.add_argument("--ramp", type=float, default=10, help="seconds to ramp up to --users")
+    parser.add_argument("--duration", type=float, default=60, help="total test duration in seconds")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help=f"scenario weights, e.g. {DEFAULT_MIX}")
+    parser.add_argument("--think-time", type=float, default=0.5, help="mean pause between scenarios in seconds")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--slo-p99-ms", type=float)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--report", default="loadtest_report.json")
+    parser.add_argument("--start-server", action="store_true", help="spawn gunicorn app:app for the test")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    base_url = args.base_url if args.base_url.endswith("/") else f"{args.base_url}/"
+    server = None
+    if args.start_server:
+        bind = base_url.split("://", 1)[1].rstrip("/")
+        server = subprocess.Popen(["gunicorn", "app:app", "--workers", str(args.workers), "--bind", bind])
+    try:
+        wait_for_server(base_url, 30)
+        stats = Stats()
+        start = time.monotonic()
+        deadline = start + args.duration
+        threads = []
+        for index in range(args.users):
+            user = VirtualUser(base_url, stats, random.Random(args.seed + index), args.timeout)
+            thread = threading.Thread(target=run_user, args=(user, args.mix, deadline, args.think_time), daemon=True)
+            threads.append(thread)
+            thread.start()
+            if args.users > 1 and index < args.users - 1:
+                time.sleep(args.ramp / (args.users - 1))
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    config = {"base_url": base_url, "users": args.users, "ramp_s": args.ramp, "duration_s": args.duration,
+              "mix": args.mix, "think_time_s": args.think_time, "slo_p99_ms": args.slo_p99_ms, "seed": args.seed}
+    report = stats.report(elapsed, config)
+    with open(args.report, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    print(json.dumps({key: report[key] for key in ("requests", "throughput_rps", "error_rate", "booking_conflicts",
+                                                  "latency_ms")}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
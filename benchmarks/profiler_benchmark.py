@@ -0,0 +1,65 @@
+import argparse
+import cProfile
+import json
+import statistics
+import threading
+import time
+
+from profiling import StackSampler
+
+
+def workload(size):
+    rows = [{"id": index, "name": f"teacher {index}", "free": {str(hour): hour % 3 == 0 for hour in range(24)}}
+            for index in range(size)]
+    return len(json.dumps(sorted(rows, key=lambda row: -row["id"])))
+
+
+def measure(label, runs, size, setup=None):
+    timings = []
+    for _ in range(runs):
+        context = setup() if setup else None
+        start = time.perf_counter()
+        workload(size)
+        timings.append(time.perf_counter() - start)
+        if context:
+            context()
+    return label, statistics.median(timings)
+
+
+def continuous(interval):
+    sampler = StackSampler(interval).start()
+    return sampler.stop
+
+
+def per_request(interval):
+    sampler = StackSampler(interval, thread_id=threading.get_ident()).start()
+    return sampler.stop
+
+
+def with_cprofile():
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler.disable
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead of the profiling hooks on a view-like workload")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--continuous-interval", type=float, default=0.05)
+    parser.add_argument("--request-interval", type=float, default=0.001)
+    args = parser.parse_args()
+
+    _, baseline = measure("baseline", args.runs, args.size)
+    results = [
+        measure("continuous sampler", args.runs, args.size, lambda: continuous(args.continuous_interval)),
+        measure("per-request sampler", args.runs, args.size, lambda: per_request(args.request_interval)),
+        measure("per-request cprofile", args.runs, args.size, with_cprofile),
+    ]
+    print(f"baseline: {baseline * 1000:.2f} ms")
+    for label, median in results:
+        print(f"{label}: {median * 1000:.2f} ms, overhead {(median / baseline - 1) * 100:+.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import json
+import random
+import statistics
+import time
+
+from data import teachers
+from search import InvertedIndex, tokenize
+
+BATCH_SIZE = 1000
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def report(label, latencies):
+    print(f"{label} latency ms: mean {statistics.mean(latencies):.3f}, p50 {percentile(latencies, 50):.3f}, "
+          f"p95 {percentile(latencies, 95):.3f}, p99 {percentile(latencies, 99):.3f}")
+
+
+def sample_about(rng, teacher):
+    tokens = tokenize(teacher["about"])
+    return " ".join(rng.sample(tokens, k=min(20, len(tokens))))
+
+
+def benchmark_index(args, rng, vocabulary):
+    start = time.perf_counter()
+    index = InvertedIndex()
+    for doc_id in range(args.teachers):
+        teacher = teachers[doc_id % len(teachers)]
+        index.add(doc_id, teacher["name"], sample_about(rng, teacher))
+    build_time = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(args.queries):
+        query = " ".join(rng.sample(vocabulary, k=rng.randint(1, 2)))
+        start = time.perf_counter()
+        index.search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    print(f"index build: {build_time * 1000:.1f} ms")
+    report("search", latencies)
+
+
+def insert_teachers(db, tables, first_id, count, goal_ids, rng):
+    teacher_table, stats_table, goals_table = tables
+    for batch_start in range(first_id, first_id + count, BATCH_SIZE):
+        batch = range(batch_start, min(batch_start + BATCH_SIZE, first_id + count))
+        rows = []
+        for teacher_id in batch:
+            teacher = teachers[teacher_id % len(teachers)]
+            rows.append({"id": teacher_id, "name": teacher["name"], "about": sample_about(rng, teacher),
+                         "rating": round(rng.uniform(3, 5), 1), "picture": teacher["picture"],
+                         "price": rng.randrange(500, 3000, 100), "free": json.dumps({})})
+        db.session.execute(teacher_table.insert(), rows)
+        db.session.execute(stats_table.insert(), [{"teacher_id": teacher_id, "bookings_count": rng.randint(0, 100)}
+                                                  for teacher_id in batch])
+        if goal_ids:
+            db.session.execute(goals_table.insert(), [{"teacher_id": teacher_id, "goal_id": goal_id}
+                                                      for teacher_id in batch
+                                                      for goal_id in rng.sample(goal_ids, k=rng.randint(1, 2))])
+    db.session.commit()
+
+
+def delete_teachers(db, tables, first_id):
+    teacher_table, stats_table, goals_table = tables
+    db.session.execute(goals_table.delete().where(goals_table.c.teacher_id >= first_id))
+    db.session.execute(stats_table.delete().where(stats_table.c.teacher_id >= first_id))
+    db.session.execute(teacher_table.delete().where(teacher_table.c.id >= first_id))
+    db.session.commit()
+
+
+def benchmark_database(args, rng, vocabulary):
+    # times search_teachers against DATABASE_URL: tsvector + GIN with ts_rank_cd on Postgres,
+    # the in-process index fallback elsewhere
+    from sqlalchemy import func
+
+    from app import app, db, search_index, search_teachers, Goal, Teacher, TeacherStats, \
+        teachers_goals_association, SORT_CHOICES
+
+    tables = (Teacher.__table__, TeacherStats.__table__, teachers_goals_association)
+    with app.test_request_context():
+        goals = dict(db.session.query(Goal.key_en, Goal.id))
+        first_id = (db.session.query(func.max(Teacher.id)).scalar() or 0) + 1
+        print(f"database: {db.engine.dialect.name}, generated teachers from id {first_id}")
+
+        start = time.perf_counter()
+        insert_teachers(db, tables, first_id, args.teachers, list(goals.values()), rng)
+        if db.engine.dialect.name == "postgresql":
+            db.session.execute("ANALYZE teachers, teacher_stats, teachers_goals")
+            db.session.commit()
+        search_index["index"] = None
+        print(f"insert: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        try:
+            latencies = {}
+            for _ in range(args.queries):
+                query = " ".join(rng.sample(vocabulary, k=rng.randint(1, 2)))
+                goal = rng.choice([""] + list(goals))
+                sort_value = rng.choice(SORT_CHOICES)
+                start = time.perf_counter()
+                search_teachers(query, goal, sort_value, rng.randint(1, 3))
+                elapsed = (time.perf_counter() - start) * 1000
+                latencies.setdefault("all", []).append(elapsed)
+                latencies.setdefault(f"goal={'yes' if goal else 'no'} sort={sort_value}", []).append(elapsed)
+            for label, values in sorted(latencies.items()):
+                report(label, values)
+        finally:
+            db.session.rollback()
+            if not args.keep:
+                delete_teachers(db, tables, first_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency benchmark for teacher search")
+    parser.add_argument("--mode", choices=("index", "database"), default="index",
+                        help="the in-process index alone, or search_teachers against DATABASE_URL")
+    parser.add_argument("--teachers", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="keep the generated teachers in the database")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = sorted({token for teacher in teachers for token in tokenize(f"{teacher['name']} {teacher['about']}")})
+
+    print(f"mode: {args.mode}, teachers: {args.teachers}, queries: {args.queries}")
+    if args.mode == "database":
+        benchmark_database(args, rng, vocabulary)
+    else:
+        benchmark_index(args, rng, vocabulary)
+
+
+if __name__ == '__main__':
+    main()
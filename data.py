@@ -1,5 +1,153 @@
 goals = {"travel": "Для путешествий", "study": "Для учебы", "work": "Для работы", "relocate": "Для переезда"}
 
+goal_translations = {
+    "travel": {"ru": "Для путешествий", "en": "For travel"},
+    "study": {"ru": "Для учебы", "en": "For study"},
+    "work": {"ru": "Для работы", "en": "For work"},
+    "relocate": {"ru": "Для переезда", "en": "For relocation"},
+}
+
+day_translations = {
+    "mon": {"ru": "Понедельник", "en": "Monday"},
+    "tue": {"ru": "Вторник", "en": "Tuesday"},
+    "wed": {"ru": "Среда", "en": "Wednesday"},
+    "thu": {"ru": "Четверг", "en": "Thursday"},
+    "fri": {"ru": "Пятница", "en": "Friday"},
+    "sat": {"ru": "Суббота", "en": "Saturday"},
+    "sun": {"ru": "Воскресенье", "en": "Sunday"},
+}
+
+labels = {
+    "ru": {
+        "booking.client_name": "Ваc зовут",
+        "booking.client_phone": "Ваш телефон",
+        "request.goal": "Какая цель занятий?",
+        "request.time": "Сколько времени есть?",
+        "request.client_name": "Ваc зовут",
+        "request.client_phone": "Ваш телефон",
+        "sort.sort": "Сортировать",
+        "search.sort": "Сортировать",
+        "search.q": "Поиск",
+        "client_name.required": "Укажите ваше имя",
+        "client_phone.required": "Укажите ваш телефон",
+        "client_phone.invalid": "Укажите телефон цифрами",
+        "q.required": "Введите запрос",
+        "time.1-2": "1-2 часа в неделю",
+        "time.3-5": "3-5 часов в неделю",
+        "time.5-7": "5-7 часов в неделю",
+        "time.7-10": "7-10 часов в неделю",
+        "sort.random": "В случайном порядке",
+        "sort.by_rating": "Сначала лучшие по рейтингу",
+        "sort.expensive_first": "Сначала дорогие",
+        "sort.cheap_first": "Сначала недорогие",
+        "sort.popular": "Сначала популярные",
+        "nav.all": "Все репетиторы",
+        "nav.request": "Заявка на подбор",
+        "nav.search": "Поиск",
+        "teacher.summary": "Рейтинг: {rating} Ставка: {price}₽ / час",
+        "teacher.details": "Показать информацию и расписание",
+        "cta.title": "Не нашли своего репетитора?",
+        "cta.text": "Расскажите, кто вам нужен и мы подберем его сами",
+        "cta.button": "Заказать подбор",
+        "index.title": "Найдите идеального репетитора английского, занимайтесь онлайн",
+        "index.teachers": "Наши преподаватели",
+        "all.title": "Все преподаватели",
+        "all.count": "{count} преподавателей в базе",
+        "sort.submit": "Сортировать",
+        "goal.title": "Преподаватели",
+        "goal.search": "Искать среди преподавателей цели",
+        "search.title": "Поиск преподавателей",
+        "search.placeholder": "Имя или о себе",
+        "search.submit": "Найти",
+        "search.found": "Найдено преподавателей: {count}",
+        "profile.book": "Записаться на пробный урок",
+        "profile.no_slots": "Нет свободных уроков",
+        "profile.slot": "{time} свободно",
+        "booking.title": "Запись на пробный урок",
+        "booking.submit": "Записаться на пробный урок",
+        "request.title": "Подбор преподавателя",
+        "request.text": "Напишите, чего вам нужно и мы подберем отличных ребят",
+        "request.submit": "Найдите мне преподавателя",
+        "done.booking": "Отправлено!",
+        "done.request": "Запрос отправлен!",
+        "done.call_back": "Скоро мы вам перезвоним",
+        "done.subject": "Тема",
+        "done.trial": "Пробный урок",
+        "done.date": "Дата",
+        "done.goal": "Цель занятий",
+        "done.time": "Времени есть",
+        "done.name": "Имя",
+        "done.phone": "Телефон",
+        "errors.not_found": "Ничего не нашлось! Вот неудача, отправляйтесь на главную!",
+        "errors.try_later": "Сервис временно недоступен, попробуйте позже",
+        "errors.slot_taken": "Это время уже занято, выберите другое",
+    },
+    "en": {
+        "booking.client_name": "Your name",
+        "booking.client_phone": "Your phone",
+        "request.goal": "What is your goal?",
+        "request.time": "How much time do you have?",
+        "request.client_name": "Your name",
+        "request.client_phone": "Your phone",
+        "sort.sort": "Sort",
+        "search.sort": "Sort",
+        "search.q": "Search",
+        "client_name.required": "Please enter your name",
+        "client_phone.required": "Please enter your phone",
+        "client_phone.invalid": "Please enter your phone number in digits",
+        "q.required": "Please enter a query",
+        "time.1-2": "1-2 hours a week",
+        "time.3-5": "3-5 hours a week",
+        "time.5-7": "5-7 hours a week",
+        "time.7-10": "7-10 hours a week",
+        "sort.random": "Random order",
+        "sort.by_rating": "Best rated first",
+        "sort.expensive_first": "Most expensive first",
+        "sort.cheap_first": "Cheapest first",
+        "sort.popular": "Most popular first",
+        "nav.all": "All tutors",
+        "nav.request": "Find me a tutor",
+        "nav.search": "Search",
+        "teacher.summary": "Rating: {rating} Rate: {price}₽ / hour",
+        "teacher.details": "Show profile and schedule",
+        "cta.title": "Haven't found your tutor?",
+        "cta.text": "Tell us who you need and we will find them for you",
+        "cta.button": "Request a match",
+        "index.title": "Find the perfect English tutor and study online",
+        "index.teachers": "Our tutors",
+        "all.title": "All tutors",
+        "all.count": "{count} tutors in the catalog",
+        "sort.submit": "Sort",
+        "goal.title": "Tutors",
+        "goal.search": "Search tutors for this goal",
+        "search.title": "Find a tutor",
+        "search.placeholder": "Name or about",
+        "search.submit": "Find",
+        "search.found": "Tutors found: {count}",
+        "profile.book": "Book a trial lesson",
+        "profile.no_slots": "No free lessons",
+        "profile.slot": "{time} available",
+        "booking.title": "Trial lesson booking",
+        "booking.submit": "Book a trial lesson",
+        "request.title": "Find a tutor",
+        "request.text": "Tell us what you need and we will find great tutors",
+        "request.submit": "Find me a tutor",
+        "done.booking": "Sent!",
+        "done.request": "Request sent!",
+        "done.call_back": "We will call you back soon",
+        "done.subject": "Subject",
+        "done.trial": "Trial lesson",
+        "done.date": "Date",
+        "done.goal": "Goal",
+        "done.time": "Time available",
+        "done.name": "Name",
+        "done.phone": "Phone",
+        "errors.not_found": "Nothing found! Bad luck, head back to the home page!",
+        "errors.try_later": "The service is temporarily unavailable, please try again later",
+        "errors.slot_taken": "This time is already taken, please choose another",
+    },
+}
+
 teachers = [
 
     {
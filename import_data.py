@@ -1,6 +1,7 @@
 import json
 
-from app import db, Teacher, Goal, Day
+from app import db, Teacher, Goal, Day, AvailabilityRule, reconcile_stats, seed_translations
+from availability import rules_from_free
 from data import teachers, goals
 
 days = {
@@ -39,5 +40,10 @@ for teacher in teachers:
     for goal in teacher['goals']:
         goal_rec = db.session.query(Goal).filter(Goal.key_en == goal).first()
         teacher_rec.goals.append(goal_rec)
+    for weekday, start_time in rules_from_free(teacher['free']):
+        teacher_rec.availability_rules.append(AvailabilityRule(weekday=weekday, start_time=start_time))
     db.session.add(teacher_rec)
 db.session.commit()
+
+seed_translations()
+reconcile_stats()
@@ -0,0 +1,81 @@
+"""Add canonical client phone and created_at to 'bookings' and 'requests' with a dedup index
+
+Revision ID: 3c9a1f2e7b40
+Revises: bd8ef74de506
+Create Date: 2026-10-19 10:12:41.518236
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '3c9a1f2e7b40'
+down_revision = 'bd8ef74de506'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+# rows that predate created_at get a sentinel so they never fall into the dedup window
+LEGACY_CREATED_AT = datetime(1970, 1, 1)
+
+
+def normalize_phone(phone):
+    # frozen copy of phones.normalize_phone as of this revision
+    phone = phone.strip()
+    digits = "".join(ch for ch in phone if ch.isdigit())
+    if not digits:
+        return ""
+    if phone.startswith("+"):
+        return f"+{digits}"
+    if phone.startswith("00"):
+        return f"+{digits[2:]}"
+    if len(digits) == 11 and digits[0] == "8":
+        return f"+7{digits[1:]}"
+    if len(digits) == 10:
+        return f"+7{digits}"
+    return f"+{digits}"
+
+
+def backfill(table_name):
+    connection = op.get_bind()
+    table = sa.table(table_name,
+                     sa.column('id', sa.Integer),
+                     sa.column('client_phone', sa.String),
+                     sa.column('client_phone_canonical', sa.String),
+                     sa.column('created_at', sa.DateTime))
+    update = table.update()\
+        .where(table.c.id == sa.bindparam('row_id'))\
+        .values(client_phone_canonical=sa.bindparam('canonical'), created_at=LEGACY_CREATED_AT)
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select([table.c.id, table.c.client_phone])
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(update, [{'row_id': row.id, 'canonical': normalize_phone(row.client_phone)}
+                                    for row in rows])
+        last_id = rows[-1].id
+
+
+def upgrade():
+    for table_name in ('bookings', 'requests'):
+        op.add_column(table_name, sa.Column('client_phone_canonical', sa.String(), nullable=True))
+        op.add_column(table_name, sa.Column('created_at', sa.DateTime(), nullable=True))
+        backfill(table_name)
+        op.alter_column(table_name, 'client_phone_canonical', nullable=False)
+        op.alter_column(table_name, 'created_at', server_default=sa.text('now()'), nullable=False)
+        op.create_index(f'ix_{table_name}_client_phone_canonical_created_at', table_name,
+                        ['client_phone_canonical', 'created_at'], unique=False)
+
+
+def downgrade():
+    for table_name in ('requests', 'bookings'):
+        op.drop_index(f'ix_{table_name}_client_phone_canonical_created_at', table_name=table_name)
+        op.drop_column(table_name, 'created_at')
+        op.drop_column(table_name, 'client_phone_canonical')
@@ -0,0 +1,119 @@
+"""Add labels for page text and error messages
+
+Revision ID: 4f8b2c6d1e73
+Revises: e91b4d6a0c38
+Create Date: 2026-10-19 18:05:12.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '4f8b2c6d1e73'
+down_revision = 'e91b4d6a0c38'
+branch_labels = None
+depends_on = None
+
+# frozen copy of the data.labels entries added after e91b4d6a0c38
+LABELS = {
+    "ru": {
+        "nav.all": "Все репетиторы",
+        "nav.request": "Заявка на подбор",
+        "nav.search": "Поиск",
+        "teacher.summary": "Рейтинг: {rating} Ставка: {price}₽ / час",
+        "teacher.details": "Показать информацию и расписание",
+        "cta.title": "Не нашли своего репетитора?",
+        "cta.text": "Расскажите, кто вам нужен и мы подберем его сами",
+        "cta.button": "Заказать подбор",
+        "index.title": "Найдите идеального репетитора английского, занимайтесь онлайн",
+        "index.teachers": "Наши преподаватели",
+        "all.title": "Все преподаватели",
+        "all.count": "{count} преподавателей в базе",
+        "sort.submit": "Сортировать",
+        "goal.title": "Преподаватели",
+        "goal.search": "Искать среди преподавателей цели",
+        "search.title": "Поиск преподавателей",
+        "search.placeholder": "Имя или о себе",
+        "search.submit": "Найти",
+        "search.found": "Найдено преподавателей: {count}",
+        "profile.book": "Записаться на пробный урок",
+        "profile.no_slots": "Нет свободных уроков",
+        "profile.slot": "{time} свободно",
+        "booking.title": "Запись на пробный урок",
+        "booking.submit": "Записаться на пробный урок",
+        "request.title": "Подбор преподавателя",
+        "request.text": "Напишите, чего вам нужно и мы подберем отличных ребят",
+        "request.submit": "Найдите мне преподавателя",
+        "done.booking": "Отправлено!",
+        "done.request": "Запрос отправлен!",
+        "done.call_back": "Скоро мы вам перезвоним",
+        "done.subject": "Тема",
+        "done.trial": "Пробный урок",
+        "done.date": "Дата",
+        "done.goal": "Цель занятий",
+        "done.time": "Времени есть",
+        "done.name": "Имя",
+        "done.phone": "Телефон",
+        "errors.not_found": "Ничего не нашлось! Вот неудача, отправляйтесь на главную!",
+        "errors.try_later": "Сервис временно недоступен, попробуйте позже",
+        "errors.slot_taken": "Это время уже занято, выберите другое",
+        "client_phone.invalid": "Укажите телефон цифрами",
+    },
+    "en": {
+        "nav.all": "All tutors",
+        "nav.request": "Find me a tutor",
+        "nav.search": "Search",
+        "teacher.summary": "Rating: {rating} Rate: {price}₽ / hour",
+        "teacher.details": "Show profile and schedule",
+        "cta.title": "Haven't found your tutor?",
+        "cta.text": "Tell us who you need and we will find them for you",
+        "cta.button": "Request a match",
+        "index.title": "Find the perfect English tutor and study online",
+        "index.teachers": "Our tutors",
+        "all.title": "All tutors",
+        "all.count": "{count} tutors in the catalog",
+        "sort.submit": "Sort",
+        "goal.title": "Tutors",
+        "goal.search": "Search tutors for this goal",
+        "search.title": "Find a tutor",
+        "search.placeholder": "Name or about",
+        "search.submit": "Find",
+        "search.found": "Tutors found: {count}",
+        "profile.book": "Book a trial lesson",
+        "profile.no_slots": "No free lessons",
+        "profile.slot": "{time} available",
+        "booking.title": "Trial lesson booking",
+        "booking.submit": "Book a trial lesson",
+        "request.title": "Find a tutor",
+        "request.text": "Tell us what you need and we will find great tutors",
+        "request.submit": "Find me a tutor",
+        "done.booking": "Sent!",
+        "done.request": "Request sent!",
+        "done.call_back": "We will call you back soon",
+        "done.subject": "Subject",
+        "done.trial": "Trial lesson",
+        "done.date": "Date",
+        "done.goal": "Goal",
+        "done.time": "Time available",
+        "done.name": "Name",
+        "done.phone": "Phone",
+        "errors.not_found": "Nothing found! Bad luck, head back to the home page!",
+        "errors.try_later": "The service is temporarily unavailable, please try again later",
+        "errors.slot_taken": "This time is already taken, please choose another",
+        "client_phone.invalid": "Please enter your phone number in digits",
+    },
+}
+
+
+def upgrade():
+    labels = sa.table('labels',
+                      sa.column('key', sa.String),
+                      sa.column('locale', sa.String),
+                      sa.column('value', sa.String))
+    op.bulk_insert(labels, [{'key': key, 'locale': locale, 'value': value}
+                            for locale, values in LABELS.items() for key, value in values.items()])
+
+
+def downgrade():
+    op.get_bind().execute(sa.text("DELETE FROM labels WHERE key = :key"),
+                          [{'key': key} for key in LABELS['ru']])
@@ -0,0 +1,31 @@
+"""Add generated 'search_vector' column with a GIN index to 'teachers'
+
+Revision ID: 5e2d8b14c9a3
+Revises: 3c9a1f2e7b40
+Create Date: 2026-10-19 11:03:17.204519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '5e2d8b14c9a3'
+down_revision = '3c9a1f2e7b40'
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR_SQL = "setweight(to_tsvector('english', name), 'A') || setweight(to_tsvector('russian', name), 'A') || " \
+                    "setweight(to_tsvector('english', about), 'B') || setweight(to_tsvector('russian', about), 'B')"
+
+
+def upgrade():
+    op.add_column('teachers', sa.Column('search_vector', postgresql.TSVECTOR(),
+                                        sa.Computed(SEARCH_VECTOR_SQL, persisted=True), nullable=True))
+    op.create_index('ix_teachers_search_vector', 'teachers', ['search_vector'], unique=False,
+                    postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_teachers_search_vector', table_name='teachers')
+    op.drop_column('teachers', 'search_vector')
@@ -0,0 +1,86 @@
+"""Add 'availability_rules' table, teacher time zone and dated 'bookings' ranges with an overlap exclusion constraint
+
+Revision ID: 8a41c7d2e915
+Revises: 5e2d8b14c9a3
+Create Date: 2026-10-19 12:26:54.870113
+
+"""
+import json
+from datetime import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '8a41c7d2e915'
+down_revision = '5e2d8b14c9a3'
+branch_labels = None
+depends_on = None
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+def backfill_rules():
+    connection = op.get_bind()
+    teachers = sa.table('teachers', sa.column('id', sa.Integer), sa.column('free', postgresql.JSONB))
+    rules = sa.table('availability_rules',
+                     sa.column('teacher_id', sa.Integer),
+                     sa.column('weekday', sa.SmallInteger),
+                     sa.column('start_time', sa.Time),
+                     sa.column('duration_minutes', sa.SmallInteger))
+    for teacher_id, free in connection.execute(sa.select([teachers.c.id, teachers.c.free])).fetchall():
+        if isinstance(free, str):
+            free = json.loads(free)
+        rows = []
+        for day_key, hours in (free or {}).items():
+            for hour, is_free in hours.items():
+                if is_free:
+                    hours_part, _, minutes_part = hour.partition(":")
+                    rows.append({"teacher_id": teacher_id,
+                                 "weekday": WEEKDAYS.index(day_key),
+                                 "start_time": time(int(hours_part), int(minutes_part or 0)),
+                                 "duration_minutes": 60})
+        if rows:
+            connection.execute(rules.insert(), rows)
+
+
+def upgrade():
+    op.add_column('teachers', sa.Column('timezone', sa.String(), server_default='Europe/Moscow', nullable=False))
+    op.create_table('availability_rules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('teacher_id', sa.Integer(), nullable=False),
+    sa.Column('weekday', sa.SmallInteger(), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=False),
+    sa.Column('duration_minutes', sa.SmallInteger(), nullable=False),
+    sa.Column('valid_from', sa.Date(), nullable=True),
+    sa.Column('valid_until', sa.Date(), nullable=True),
+    sa.CheckConstraint('weekday BETWEEN 0 AND 6', name='ck_availability_rules_weekday'),
+    sa.CheckConstraint('duration_minutes > 0', name='ck_availability_rules_duration_minutes'),
+    sa.ForeignKeyConstraint(['teacher_id'], ['teachers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_availability_rules_teacher_id_weekday', 'availability_rules', ['teacher_id', 'weekday'],
+                    unique=False)
+    backfill_rules()
+
+    # legacy bookings only know a weekday, so their ranges stay NULL and are ignored by the constraint
+    op.add_column('bookings', sa.Column('starts_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('bookings', sa.Column('ends_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_check_constraint('ck_bookings_range', 'bookings', 'starts_at < ends_at')
+    op.create_index('ix_bookings_teacher_id_starts_at', 'bookings', ['teacher_id', 'starts_at'], unique=False)
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.execute('ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap '
+               'EXCLUDE USING gist (teacher_id WITH =, tstzrange(starts_at, ends_at) WITH &&) '
+               'WHERE (starts_at IS NOT NULL AND ends_at IS NOT NULL)')
+
+
+def downgrade():
+    op.execute('ALTER TABLE bookings DROP CONSTRAINT bookings_no_overlap')
+    op.drop_index('ix_bookings_teacher_id_starts_at', table_name='bookings')
+    op.drop_constraint('ck_bookings_range', 'bookings', type_='check')
+    op.drop_column('bookings', 'ends_at')
+    op.drop_column('bookings', 'starts_at')
+    op.drop_index('ix_availability_rules_teacher_id_weekday', table_name='availability_rules')
+    op.drop_table('availability_rules')
+    op.drop_column('teachers', 'timezone')
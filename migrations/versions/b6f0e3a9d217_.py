@@ -0,0 +1,58 @@
+"""Add 'teacher_stats' and 'goal_stats' counter tables
+
+Revision ID: b6f0e3a9d217
+Revises: 8a41c7d2e915
+Create Date: 2026-10-19 13:41:09.332871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b6f0e3a9d217'
+down_revision = '8a41c7d2e915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('teacher_stats',
+    sa.Column('teacher_id', sa.Integer(), nullable=False),
+    sa.Column('bookings_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('free_slots', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_booked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['teacher_id'], ['teachers.id'], ),
+    sa.PrimaryKeyConstraint('teacher_id')
+    )
+    op.create_index('ix_teacher_stats_bookings_count', 'teacher_stats', ['bookings_count'], unique=False)
+    op.create_table('goal_stats',
+    sa.Column('goal_id', sa.Integer(), nullable=False),
+    sa.Column('teachers_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('bookings_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('requests_count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['goal_id'], ['goals.id'], ),
+    sa.PrimaryKeyConstraint('goal_id')
+    )
+
+    # free_slots depends on the availability calendar and is filled in by "flask reconcile-stats"
+    op.execute("""
+        INSERT INTO teacher_stats (teacher_id, bookings_count, last_booked_at)
+        SELECT teachers.id, count(bookings.id), max(nullif(bookings.created_at, '1970-01-01')) AT TIME ZONE 'UTC'
+        FROM teachers LEFT JOIN bookings ON bookings.teacher_id = teachers.id
+        GROUP BY teachers.id
+    """)
+    op.execute("""
+        INSERT INTO goal_stats (goal_id, teachers_count, bookings_count, requests_count)
+        SELECT goals.id,
+               (SELECT count(*) FROM teachers_goals WHERE teachers_goals.goal_id = goals.id),
+               (SELECT count(*) FROM bookings JOIN teachers_goals ON teachers_goals.teacher_id = bookings.teacher_id
+                WHERE teachers_goals.goal_id = goals.id),
+               (SELECT count(*) FROM requests WHERE requests.goal = goals.key_en)
+        FROM goals
+    """)
+
+
+def downgrade():
+    op.drop_table('goal_stats')
+    op.drop_index('ix_teacher_stats_bookings_count', table_name='teacher_stats')
+    op.drop_table('teacher_stats')
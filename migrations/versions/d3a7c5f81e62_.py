@@ -0,0 +1,242 @@
+"""Tighten 'teachers', 'bookings', 'days', 'goals' and 'teachers_goals' columns: numeric money, day codes,
+time-of-day, NOT NULL, unique keys and CHECK constraints
+
+Revision ID: d3a7c5f81e62
+Revises: b6f0e3a9d217
+Create Date: 2026-10-19 15:08:52.640193
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd3a7c5f81e62'
+down_revision = 'b6f0e3a9d217'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+BATCH_SIZE = 5000
+TABLES = ('teachers', 'bookings', 'days', 'goals', 'teachers_goals')
+WEEKDAYS_SQL = "ARRAY['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']"
+# expressions for the *_new columns; {row} is "NEW." inside the sync triggers and empty in the backfill
+TEACHERS_NEW = {
+    'price_new': "round({row}price::numeric, 2)",
+    'rating_new': "round({row}rating::numeric, 1)",
+}
+BOOKINGS_NEW = {
+    'day_new': f"array_position({WEEKDAYS_SQL}, left(lower({{row}}day), 3)::text) - 1",
+    'time_new': "{row}time::time",
+}
+# maps every duplicate goal id to the lowest id with the same key_en
+GOAL_SURVIVORS_SQL = "(SELECT a.id AS duplicate_id, min(b.id) AS goal_id FROM goals a " \
+                     "JOIN goals b ON b.key_en = a.key_en AND b.id < a.id GROUP BY a.id) AS survivors"
+
+
+def measure(stage):
+    connection = op.get_bind()
+    for table in TABLES:
+        row = connection.execute(sa.text(
+            f"SELECT pg_relation_size('{table}'), pg_indexes_size('{table}'), "
+            f"(SELECT coalesce(avg(pg_column_size(t.*)), 0) FROM {table} AS t)"
+        )).fetchone()
+        logger.info("%s %s: table %d bytes, indexes %d bytes, avg row %.1f bytes", stage, table, *row)
+
+
+def column_info(table, column):
+    return op.get_bind().execute(sa.text(
+        "SELECT data_type, is_nullable FROM information_schema.columns "
+        "WHERE table_name = :table AND column_name = :column"
+    ), table=table, column=column).fetchone()
+
+
+def constraint_exists(name):
+    return op.get_bind().execute(sa.text("SELECT 1 FROM pg_constraint WHERE conname = :name"), name=name).scalar()
+
+
+def precheck():
+    # rows that would fail the new constraints are reported before anything is committed
+    teachers = op.get_bind().execute(sa.text(
+        "SELECT count(*) FROM teachers WHERE price < 0 OR rating NOT BETWEEN 0 AND 5"
+    )).scalar()
+    if teachers:
+        raise RuntimeError(f"{teachers} teachers have a negative price or a rating outside 0..5, fix them first")
+
+
+def move_aside(table, where):
+    # rows that cannot be migrated are kept in {table}_orphaned instead of being deleted
+    op.execute(f"CREATE TABLE IF NOT EXISTS {table}_orphaned (LIKE {table})")
+    moved = op.get_bind().execute(sa.text(
+        f"WITH moved AS (DELETE FROM {table} WHERE {where} RETURNING *) "
+        f"INSERT INTO {table}_orphaned SELECT * FROM moved"
+    )).rowcount
+    if moved:
+        logger.warning("moved %d rows from %s to %s_orphaned: %s", moved, table, table, where)
+
+
+def create_sync_trigger(table, expressions):
+    # keeps the *_new columns in step with writes that land while the batched backfill runs
+    assignments = " ".join(f"NEW.{column} := {expression.format(row='NEW.')};"
+                           for column, expression in expressions.items())
+    op.execute(f"CREATE OR REPLACE FUNCTION {table}_sync_new() RETURNS trigger AS $$ "
+               f"BEGIN {assignments} RETURN NEW; END $$ LANGUAGE plpgsql")
+    op.execute(f"DROP TRIGGER IF EXISTS {table}_sync_new ON {table}")
+    op.execute(f"CREATE TRIGGER {table}_sync_new BEFORE INSERT OR UPDATE ON {table} "
+               f"FOR EACH ROW EXECUTE PROCEDURE {table}_sync_new()")
+
+
+def drop_sync_trigger(table):
+    op.execute(f"DROP TRIGGER IF EXISTS {table}_sync_new ON {table}")
+    op.execute(f"DROP FUNCTION IF EXISTS {table}_sync_new()")
+
+
+def add_columns(table, columns):
+    for column, type_ in columns.items():
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {type_}")
+
+
+def backfill(table, expressions):
+    connection = op.get_bind()
+    assignments = ", ".join(f"{column} = {expression.format(row='')}" for column, expression in expressions.items())
+    where = f"{next(iter(expressions))} IS NULL"
+    low, high = connection.execute(sa.text(f"SELECT min(id), max(id) FROM {table}")).fetchone()
+    if low is None:
+        return
+    for start in range(low - 1, high, BATCH_SIZE):
+        with op.get_context().autocommit_block():
+            connection.execute(sa.text(
+                f"UPDATE {table} SET {assignments} WHERE id > :start AND id <= :end AND {where}"
+            ), start=start, end=start + BATCH_SIZE)
+
+
+def add_check(table, name, condition):
+    # NOT VALID needs only a brief lock and VALIDATE scans under SHARE UPDATE EXCLUSIVE, so both
+    # run in their own transactions while reads and writes carry on
+    with op.get_context().autocommit_block():
+        if not constraint_exists(name):
+            op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} CHECK ({condition}) NOT VALID")
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+
+def prepare_not_null(table, column):
+    add_check(table, f"{table}_{column}_not_null", f"{column} IS NOT NULL")
+
+
+def set_not_null(table, column, check=None):
+    # with a validated "IS NOT NULL" check in place SET NOT NULL skips the table scan
+    op.alter_column(table, column, nullable=False)
+    op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {check or f'{table}_{column}_not_null'}")
+
+
+def swap_column(table, column):
+    op.drop_column(table, column)
+    op.alter_column(table, f"{column}_new", new_column_name=column)
+    set_not_null(table, column, f"{table}_{column}_new_not_null")
+
+
+def migrate_columns(table, columns, expressions):
+    add_columns(table, columns)
+    create_sync_trigger(table, expressions)
+    backfill(table, expressions)
+    for column in columns:
+        prepare_not_null(table, column)
+    drop_sync_trigger(table)
+    for column in columns:
+        swap_column(table, column[:-len("_new")])
+
+
+def create_unique_index(name, table, columns):
+    with op.get_context().autocommit_block():
+        # a failed concurrent build leaves an invalid index that IF NOT EXISTS would happily keep
+        if op.get_bind().execute(sa.text(
+                "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), name=name).scalar():
+            op.execute(f"DROP INDEX CONCURRENTLY {name}")
+        op.execute(f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def add_unique(table, column):
+    name = f"uq_{table}_{column}"
+    if constraint_exists(name):
+        return
+    create_unique_index(name, table, column)
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
+
+
+def upgrade():
+    measure("before")
+    precheck()
+
+    # every step checks what an interrupted run already committed, so the migration can simply be rerun
+    if column_info('teachers', 'price').data_type != 'numeric':
+        migrate_columns('teachers', {'price_new': 'numeric(10, 2)', 'rating_new': 'numeric(2, 1)'}, TEACHERS_NEW)
+    add_check('teachers', 'ck_teachers_price', 'price >= 0')
+    add_check('teachers', 'ck_teachers_rating', 'rating BETWEEN 0 AND 5')
+    if column_info('teachers', 'free').is_nullable == 'YES':
+        op.execute("UPDATE teachers SET free = '{}' WHERE free IS NULL")
+        prepare_not_null('teachers', 'free')
+        set_not_null('teachers', 'free')
+
+    if column_info('bookings', 'day').data_type != 'smallint':
+        move_aside('bookings', f"teacher_id IS NULL "
+                               f"OR array_position({WEEKDAYS_SQL}, left(lower(day), 3)::text) IS NULL "
+                               f"OR time !~ '^([01]?[0-9]|2[0-3]):[0-5][0-9]$'")
+        migrate_columns('bookings', {'day_new': 'smallint', 'time_new': 'time'}, BOOKINGS_NEW)
+    add_check('bookings', 'ck_bookings_day', 'day BETWEEN 0 AND 6')
+    if column_info('bookings', 'teacher_id').is_nullable == 'YES':
+        prepare_not_null('bookings', 'teacher_id')
+        set_not_null('bookings', 'teacher_id')
+
+    # nothing references days by id at this revision, so duplicates can simply go
+    op.execute("DELETE FROM days a USING days b WHERE a.key_en = b.key_en AND a.id > b.id")
+    add_unique('days', 'key_en')
+    # duplicate goals hand their teachers over to the surviving id; their counters are recounted from scratch
+    op.execute(f"UPDATE teachers_goals SET goal_id = survivors.goal_id FROM {GOAL_SURVIVORS_SQL} "
+               "WHERE teachers_goals.goal_id = survivors.duplicate_id")
+    op.execute(f"DELETE FROM goal_stats USING {GOAL_SURVIVORS_SQL} WHERE goal_stats.goal_id = survivors.duplicate_id")
+    op.execute(f"""
+        UPDATE goal_stats SET
+            teachers_count = (SELECT count(DISTINCT teacher_id) FROM teachers_goals
+                              WHERE teachers_goals.goal_id = goal_stats.goal_id),
+            bookings_count = (SELECT count(*) FROM bookings WHERE bookings.teacher_id IN
+                              (SELECT teacher_id FROM teachers_goals WHERE teachers_goals.goal_id = goal_stats.goal_id))
+        WHERE goal_id IN (SELECT goal_id FROM {GOAL_SURVIVORS_SQL})
+    """)
+    op.execute("DELETE FROM goals a USING goals b WHERE a.key_en = b.key_en AND a.id > b.id")
+    add_unique('goals', 'key_en')
+
+    if not constraint_exists('teachers_goals_pkey'):
+        op.execute("DELETE FROM teachers_goals WHERE teacher_id IS NULL OR goal_id IS NULL")
+        op.execute("DELETE FROM teachers_goals a USING teachers_goals b "
+                   "WHERE a.teacher_id = b.teacher_id AND a.goal_id = b.goal_id AND a.ctid > b.ctid")
+        prepare_not_null('teachers_goals', 'teacher_id')
+        prepare_not_null('teachers_goals', 'goal_id')
+        create_unique_index('teachers_goals_pkey', 'teachers_goals', 'teacher_id, goal_id')
+        set_not_null('teachers_goals', 'teacher_id')
+        set_not_null('teachers_goals', 'goal_id')
+        op.execute("ALTER TABLE teachers_goals ADD CONSTRAINT teachers_goals_pkey "
+                   "PRIMARY KEY USING INDEX teachers_goals_pkey")
+
+    op.execute("ANALYZE teachers, bookings, days, goals, teachers_goals")
+    measure("after")
+
+
+def downgrade():
+    op.drop_constraint('teachers_goals_pkey', 'teachers_goals', type_='primary')
+    op.alter_column('teachers_goals', 'teacher_id', nullable=True)
+    op.alter_column('teachers_goals', 'goal_id', nullable=True)
+    op.drop_constraint('uq_goals_key_en', 'goals', type_='unique')
+    op.drop_constraint('uq_days_key_en', 'days', type_='unique')
+
+    op.alter_column('bookings', 'teacher_id', nullable=True)
+    op.drop_constraint('ck_bookings_day', 'bookings', type_='check')
+    op.alter_column('bookings', 'time', type_=sa.String(), postgresql_using="to_char(time, 'FMHH24:MI')")
+    op.alter_column('bookings', 'day', type_=sa.String(), postgresql_using=f"({WEEKDAYS_SQL})[day + 1]")
+
+    op.alter_column('teachers', 'free', nullable=True)
+    op.drop_constraint('ck_teachers_rating', 'teachers', type_='check')
+    op.drop_constraint('ck_teachers_price', 'teachers', type_='check')
+    op.alter_column('teachers', 'rating', type_=sa.Float(), postgresql_using='rating::double precision')
+    op.alter_column('teachers', 'price', type_=sa.Float(), postgresql_using='price::double precision')
@@ -0,0 +1,110 @@
+"""Add 'goal_translations', 'day_translations' and 'labels' tables for per-locale catalog labels
+
+Revision ID: e91b4d6a0c38
+Revises: d3a7c5f81e62
+Create Date: 2026-10-19 16:22:30.117548
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e91b4d6a0c38'
+down_revision = 'd3a7c5f81e62'
+branch_labels = None
+depends_on = None
+
+# frozen copy of data.goal_translations (english names) and data.labels as of this revision
+GOAL_NAMES_EN = {
+    "travel": "For travel",
+    "study": "For study",
+    "work": "For work",
+    "relocate": "For relocation",
+}
+LABELS = {
+    "ru": {
+        "booking.client_name": "Ваc зовут",
+        "booking.client_phone": "Ваш телефон",
+        "request.goal": "Какая цель занятий?",
+        "request.time": "Сколько времени есть?",
+        "request.client_name": "Ваc зовут",
+        "request.client_phone": "Ваш телефон",
+        "sort.sort": "Сортировать",
+        "search.sort": "Сортировать",
+        "search.q": "Поиск",
+        "client_name.required": "Укажите ваше имя",
+        "client_phone.required": "Укажите ваш телефон",
+        "q.required": "Введите запрос",
+        "time.1-2": "1-2 часа в неделю",
+        "time.3-5": "3-5 часов в неделю",
+        "time.5-7": "5-7 часов в неделю",
+        "time.7-10": "7-10 часов в неделю",
+        "sort.random": "В случайном порядке",
+        "sort.by_rating": "Сначала лучшие по рейтингу",
+        "sort.expensive_first": "Сначала дорогие",
+        "sort.cheap_first": "Сначала недорогие",
+        "sort.popular": "Сначала популярные",
+    },
+    "en": {
+        "booking.client_name": "Your name",
+        "booking.client_phone": "Your phone",
+        "request.goal": "What is your goal?",
+        "request.time": "How much time do you have?",
+        "request.client_name": "Your name",
+        "request.client_phone": "Your phone",
+        "sort.sort": "Sort",
+        "search.sort": "Sort",
+        "search.q": "Search",
+        "client_name.required": "Please enter your name",
+        "client_phone.required": "Please enter your phone",
+        "q.required": "Please enter a query",
+        "time.1-2": "1-2 hours a week",
+        "time.3-5": "3-5 hours a week",
+        "time.5-7": "5-7 hours a week",
+        "time.7-10": "7-10 hours a week",
+        "sort.random": "Random order",
+        "sort.by_rating": "Best rated first",
+        "sort.expensive_first": "Most expensive first",
+        "sort.cheap_first": "Cheapest first",
+        "sort.popular": "Most popular first",
+    },
+}
+
+
+def upgrade():
+    op.create_table('goal_translations',
+    sa.Column('goal_id', sa.Integer(), nullable=False),
+    sa.Column('locale', sa.String(length=8), nullable=False),
+    sa.Column('value', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['goal_id'], ['goals.id'], ),
+    sa.PrimaryKeyConstraint('goal_id', 'locale')
+    )
+    op.create_table('day_translations',
+    sa.Column('day_id', sa.Integer(), nullable=False),
+    sa.Column('locale', sa.String(length=8), nullable=False),
+    sa.Column('value', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['day_id'], ['days.id'], ),
+    sa.PrimaryKeyConstraint('day_id', 'locale')
+    )
+    labels_table = op.create_table('labels',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('locale', sa.String(length=8), nullable=False),
+    sa.Column('value', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('key', 'locale')
+    )
+
+    op.execute("INSERT INTO goal_translations (goal_id, locale, value) SELECT id, 'ru', value_ru FROM goals")
+    op.get_bind().execute(
+        sa.text("INSERT INTO goal_translations (goal_id, locale, value) SELECT id, 'en', :value FROM goals "
+                "WHERE key_en = :key"),
+        [{'key': key, 'value': value} for key, value in GOAL_NAMES_EN.items()])
+    op.execute("INSERT INTO day_translations (day_id, locale, value) SELECT id, 'ru', value_ru FROM days")
+    op.execute("INSERT INTO day_translations (day_id, locale, value) SELECT id, 'en', initcap(value_en) FROM days")
+    op.bulk_insert(labels_table, [{'key': key, 'locale': locale, 'value': value}
+                                  for locale, values in LABELS.items() for key, value in values.items()])
+
+
+def downgrade():
+    op.drop_table('labels')
+    op.drop_table('day_translations')
+    op.drop_table('goal_translations')
@@ -0,0 +1,22 @@
+DEFAULT_COUNTRY_CODE = "7"
+
+
+def normalize_phone(phone, country_code=DEFAULT_COUNTRY_CODE):
+    phone = phone.strip()
+    digits = "".join(ch for ch in phone if ch.isdigit())
+    if not digits:
+        return ""
+
+    if phone.startswith("+"):
+        return f"+{digits}"
+    if phone.startswith("00"):
+        return f"+{digits[2:]}"
+    if country_code == "7" and len(digits) == 11 and digits[0] == "8":
+        return f"+7{digits[1:]}"
+    if len(digits) == 10:
+        return f"+{country_code}{digits}"
+    return f"+{digits}"
+
+
+def normalize_name(name):
+    return " ".join(name.split())
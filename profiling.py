@@ -0,0 +1,179 @@
+import cProfile
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import request, g
+
+TRUNCATED = "[truncated]"
+SUFFIXES = (".prof", ".collapsed")
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame):
+    stack = []
+    while frame is not None:
+        stack.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class StackSampler:
+    def __init__(self, interval, thread_id=None, max_stacks=10000):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.max_stacks = max_stacks
+        self.stacks = Counter()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frames = {self.thread_id: frames[self.thread_id]} if self.thread_id in frames else {}
+            with self.lock:
+                for thread_id, frame in frames.items():
+                    if thread_id == own_id:
+                        continue
+                    stack = collapse(frame)
+                    if stack not in self.stacks and len(self.stacks) >= self.max_stacks:
+                        stack = TRUNCATED
+                    self.stacks[stack] += 1
+
+    def drain(self):
+        with self.lock:
+            stacks, self.stacks = self.stacks, Counter()
+        return stacks
+
+
+def write_collapsed(path, stacks):
+    with open(path, "w") as output:
+        for stack, count in stacks.most_common():
+            output.write(f"{stack} {count}\n")
+    os.chmod(path, 0o600)
+
+
+class Profiler:
+    def __init__(self, app=None):
+        self.continuous = None
+        self.continuous_pid = None
+        self.last_flush = 0
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PROFILE_SECRET", None)
+        app.config.setdefault("PROFILE_HEADER", "X-Profile")
+        app.config.setdefault("PROFILE_SAMPLE_RATE", 0.0)
+        app.config.setdefault("PROFILE_MODE", "sampler")
+        app.config.setdefault("PROFILE_REQUEST_INTERVAL", 0.001)
+        app.config.setdefault("PROFILE_CONTINUOUS", False)
+        app.config.setdefault("PROFILE_CONTINUOUS_INTERVAL", 0.05)
+        app.config.setdefault("PROFILE_FLUSH_INTERVAL", 60)
+        app.config.setdefault("PROFILE_DIR", "profiles")
+        app.config.setdefault("PROFILE_MAX_FILES", 500)
+        app.config.setdefault("PROFILE_MAX_BYTES", 200 * 1024 * 1024)
+        self.config = app.config
+        app.before_request(self.before_request)
+        app.teardown_request(self.teardown_request)
+        app.extensions["profiler"] = self
+
+    def prune(self, directory):
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(SUFFIXES):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        # keep the newest files within budget, leaving room for the one about to be written
+        kept, total = 0, 0
+        for _, size, path in sorted(entries, reverse=True):
+            kept += 1
+            total += size
+            if kept >= self.config["PROFILE_MAX_FILES"] or total > self.config["PROFILE_MAX_BYTES"]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def output_path(self, name, suffix):
+        directory = self.config["PROFILE_DIR"]
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self.prune(directory)
+        unique = f"{os.getpid()}-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+        return os.path.join(directory, f"{name}-{unique}.{suffix}")
+
+    def should_profile(self):
+        secret = self.config["PROFILE_SECRET"]
+        header = request.headers.get(self.config["PROFILE_HEADER"])
+        if secret and header and hmac.compare_digest(header.encode(), secret.encode()):
+            return True
+        return random.random() < self.config["PROFILE_SAMPLE_RATE"]
+
+    def ensure_continuous(self):
+        if not self.config["PROFILE_CONTINUOUS"] or self.continuous_pid == os.getpid():
+            return
+        with self.lock:
+            if self.continuous_pid != os.getpid():
+                self.continuous = StackSampler(self.config["PROFILE_CONTINUOUS_INTERVAL"]).start()
+                self.continuous_pid = os.getpid()
+                self.last_flush = time.monotonic()
+
+    def flush_continuous(self):
+        if self.continuous is None or time.monotonic() - self.last_flush < self.config["PROFILE_FLUSH_INTERVAL"]:
+            return
+        with self.lock:
+            if time.monotonic() - self.last_flush < self.config["PROFILE_FLUSH_INTERVAL"]:
+                return
+            self.last_flush = time.monotonic()
+            stacks = self.continuous.drain()
+        if stacks:
+            write_collapsed(self.output_path("worker", "collapsed"), stacks)
+
+    def before_request(self):
+        self.ensure_continuous()
+        if not self.should_profile():
+            return
+        if self.config["PROFILE_MODE"] == "cprofile":
+            g.request_profiler = cProfile.Profile()
+            g.request_profiler.enable()
+        else:
+            g.request_profiler = StackSampler(self.config["PROFILE_REQUEST_INTERVAL"],
+                                              thread_id=threading.get_ident()).start()
+
+    def teardown_request(self, _):
+        profiler = g.pop("request_profiler", None)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            path = self.output_path(request.endpoint or "request", "prof")
+            profiler.dump_stats(path)
+            os.chmod(path, 0o600)
+        elif profiler is not None:
+            profiler.stop()
+            write_collapsed(self.output_path(request.endpoint or "request", "collapsed"), profiler.drain())
+        self.flush_continuous()
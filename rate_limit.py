@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import request
+
+from phones import normalize_phone
+
+
+class MemoryStore:
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate, now):
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+            return allowed
+
+
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * refill_rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HMSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return allowed
+"""
+
+
+class LocalSharedClient:
+    def __init__(self, max_keys=100000):
+        self.store = MemoryStore(max_keys)
+
+    def register_script(self, _):
+        def token_bucket(keys, args):
+            capacity, refill_rate, now, _ = args
+            return int(self.store.consume(keys[0], capacity, refill_rate, now))
+        return token_bucket
+
+
+class SharedStore:
+    def __init__(self, client, prefix="ratelimit:"):
+        self.prefix = prefix
+        self.token_bucket = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def consume(self, key, capacity, refill_rate, now):
+        ttl = int(capacity / refill_rate) + 1
+        return bool(self.token_bucket(keys=[f"{self.prefix}{key}"], args=[capacity, refill_rate, now, ttl]))
+
+
+def make_store(app):
+    if app.config.get("RATELIMIT_STORAGE") != "shared":
+        return MemoryStore(app.config.get("RATELIMIT_MAX_KEYS", 100000))
+
+    url = app.config.get("RATELIMIT_STORAGE_URL")
+    if url:
+        try:
+            import redis
+        except ImportError:
+            app.logger.warning("redis is not installed, falling back to local shared store")
+        else:
+            return SharedStore(redis.Redis.from_url(url))
+    return SharedStore(LocalSharedClient(app.config.get("RATELIMIT_MAX_KEYS", 100000)))
+
+
+class RateLimiter:
+    def __init__(self, app=None):
+        self.store = None
+        self.limits = {}
+        self.rejected = {"ip": 0, "phone": 0}
+        self.counter_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("RATELIMIT_ENABLED", True)
+        app.config.setdefault("RATELIMIT_IP", (10, 60))
+        app.config.setdefault("RATELIMIT_PHONE", (3, 600))
+        app.config.setdefault("RATELIMIT_ENDPOINTS", ("render_request", "render_booking"))
+        app.config.setdefault("RATELIMIT_BEHIND_PROXY", False)
+        self.store = make_store(app)
+        for kind in ("ip", "phone"):
+            capacity, period = app.config[f"RATELIMIT_{kind.upper()}"]
+            self.limits[kind] = (capacity, capacity / period)
+        self.endpoints = set(app.config["RATELIMIT_ENDPOINTS"])
+        self.enabled = app.config["RATELIMIT_ENABLED"]
+        self.behind_proxy = app.config["RATELIMIT_BEHIND_PROXY"]
+        app.before_request(self.check)
+        app.extensions["rate_limiter"] = self
+
+    def init_phone_check(self, app):
+        # registered after CSRFProtect: only requests with a valid token spend a customer's phone bucket
+        app.before_request(self.check_phone)
+
+    def allow(self, kind, value):
+        capacity, refill_rate = self.limits[kind]
+        if self.store.consume(f"{kind}:{value}", capacity, refill_rate, time.time()):
+            return True
+        with self.counter_lock:
+            self.rejected[kind] += 1
+        return False
+
+    def applies(self):
+        return self.enabled and request.method == "POST" and request.endpoint in self.endpoints
+
+    def check(self):
+        if not self.applies():
+            return None
+
+        if self.behind_proxy and request.access_route:
+            ip = request.access_route[-1]
+        else:
+            ip = request.remote_addr
+        if not self.allow("ip", ip):
+            return self.too_many_requests("ip")
+        return None
+
+    def check_phone(self):
+        if not self.applies():
+            return None
+
+        phone = normalize_phone(request.form.get("client_phone", ""))
+        if phone and not self.allow("phone", phone):
+            return self.too_many_requests("phone")
+
+        return None
+
+    def too_many_requests(self, kind):
+        _, refill_rate = self.limits[kind]
+        return "Слишком много запросов, попробуйте позже", 429, {"Retry-After": str(int(1 / refill_rate) + 1)}
+
+    def stats(self):
+        with self.counter_lock:
+            return dict(self.rejected)
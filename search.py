@@ -0,0 +1,55 @@
+import math
+import re
+from collections import defaultdict
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+NAME_WEIGHT = 2.0
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1]
+
+
+class InvertedIndex:
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+
+    def add(self, doc_id, name, about):
+        weights = defaultdict(float)
+        for token in tokenize(name):
+            weights[token] += NAME_WEIGHT
+        for token in tokenize(about):
+            weights[token] += 1.0
+        for token, weight in weights.items():
+            self.postings[token][doc_id] = weight
+        self.lengths[doc_id] = sum(weights.values()) or 1.0
+
+    def search(self, query):
+        terms = set(tokenize(query))
+        if not terms:
+            return {}
+
+        matches = []
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                return {}
+            matches.append((term, postings))
+        matches.sort(key=lambda match: len(match[1]))
+
+        doc_ids = set(matches[0][1])
+        for _, postings in matches[1:]:
+            doc_ids.intersection_update(postings)
+            if not doc_ids:
+                return {}
+
+        total = len(self.lengths)
+        scores = {}
+        for doc_id in doc_ids:
+            score = 0.0
+            for _, postings in matches:
+                idf = math.log(1 + total / len(postings))
+                score += postings[doc_id] / self.lengths[doc_id] * idf
+            scores[doc_id] = score
+        return scores
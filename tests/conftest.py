@@ -0,0 +1,43 @@
+import os
+import re
+import sys
+import tempfile
+
+import pytest
+from flask.testing import FlaskClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'tests.db')}")
+
+CSRF_TOKEN_RE = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+
+
+class IsolatedClient(FlaskClient):
+    # app_db keeps an app context pushed, which requests would otherwise share together with its g
+    def open(self, *args, **kwargs):
+        with self.application.app_context():
+            return super().open(*args, **kwargs)
+
+
+@pytest.fixture
+def app_db(monkeypatch):
+    import app as module
+    from app import app, db
+
+    module.catalog_cache["catalog"] = None
+    module.response_cache.clear()
+    module.limiter.enabled = False
+    monkeypatch.setattr(app, "test_client_class", IsolatedClient)
+    with app.app_context():
+        db.create_all()
+        yield db
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def submit():
+    def post(client, url, **data):
+        token = CSRF_TOKEN_RE.search(client.get(url).data.decode()).group(1)
+        return client.post(url, data={"csrf_token": token, **data})
+    return post
@@ -0,0 +1,69 @@
+import json
+from datetime import date, time, timedelta
+
+import pytest
+
+from availability import WEEKDAYS
+
+
+@pytest.fixture
+def client(app_db):
+    import app
+
+    for key in WEEKDAYS:
+        app_db.session.add(app.Day(key_en=key, value_ru=key, value_en=f"{key}day"))
+    teacher = app.Teacher(id=1, name="Anna", about="english", rating=5, picture="", price=1000, free=json.dumps({}))
+    for weekday in range(7):
+        teacher.availability_rules.append(app.AvailabilityRule(weekday=weekday, start_time=time(10)))
+        teacher.availability_rules.append(app.AvailabilityRule(weekday=weekday, start_time=time(14, 30)))
+        teacher.availability_rules.append(app.AvailabilityRule(weekday=weekday, start_time=time(12),
+                                                               valid_until=date.today() - timedelta(days=1)))
+    app_db.session.add(teacher)
+    app_db.session.commit()
+    return app.app.test_client()
+
+
+@pytest.fixture
+def book(submit):
+    def post(client, url, phone):
+        return submit(client, url, client_name="Ivan", client_phone=phone)
+    return post
+
+
+def test_profile_lists_only_rule_slots(client):
+    page = client.get("/profiles/1/").data.decode()
+    assert "/booking/1/monday/10:00/" in page
+    assert "/booking/1/monday/14:30/" in page
+    assert "/12:00/" not in page
+
+
+def test_booking_hides_slot_and_rejects_overlap(client, book):
+    response = book(client, "/booking/1/monday/10/", "+79120000001")
+    assert response.status_code == 302
+
+    response = client.get("/profiles/1/")
+    assert response.status_code == 200
+    assert "/booking/1/monday/10:00/" not in response.data.decode()
+    assert book(client, "/booking/1/monday/10/", "+79120000002").status_code == 409
+
+
+def test_booking_half_hour_slot(client, book):
+    assert client.get("/booking/1/monday/14:30/").status_code == 200
+    assert book(client, "/booking/1/monday/14:30/", "+79120000001").status_code == 302
+
+
+def test_booking_expired_rule_is_not_found(client):
+    assert client.get("/booking/1/monday/12/").status_code == 404
+
+
+def test_booking_increments_stats(client, book, app_db):
+    import app
+
+    app_db.session.add(app.Goal(id=1, key_en="work", value_ru="Для работы", icon=""))
+    app_db.session.execute(app.teachers_goals_association.insert().values(teacher_id=1, goal_id=1))
+    app_db.session.commit()
+
+    assert book(client, "/booking/1/monday/10/", "+79120000001").status_code == 302
+    assert book(client, "/booking/1/tuesday/10/", "+79120000001").status_code == 302
+    assert app_db.session.query(app.TeacherStats).get(1).bookings_count == 2
+    assert app_db.session.query(app.GoalStats).get(1).bookings_count == 2
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from sqlalchemy import event
+
+from availability import WEEKDAYS
+
+
+@pytest.fixture
+def client(app_db):
+    import app
+
+    for key in WEEKDAYS:
+        app_db.session.add(app.Day(key_en=key, value_ru=key, value_en=f"{key}day"))
+    goal = app.Goal(id=1, key_en="work", value_ru="Для работы", icon="")
+    teacher = app.Teacher(id=1, name="Anna", about="english", rating=5, picture="", price=1000, free=json.dumps({}))
+    teacher.goals.append(goal)
+    app_db.session.add(teacher)
+    app_db.session.commit()
+    app.seed_translations()
+    return app.app.test_client()
+
+
+def test_lang_param_is_remembered_in_session(client):
+    assert "All tutors" in client.get("/?lang=en").data.decode()
+    page = client.get("/request/").data.decode()
+    assert "What is your goal?" in page and "Find me a tutor" in page
+    assert "Все репетиторы" in client.get("/?lang=ru").data.decode()
+
+
+def test_accept_language_picks_locale(client):
+    assert "All tutors" in client.get("/", headers={"Accept-Language": "en-US,en;q=0.9"}).data.decode()
+    assert "Все репетиторы" in client.get("/", headers={"Accept-Language": "de"}).data.decode()
+
+
+def test_form_choices_are_localized(client):
+    page = client.get("/request/?lang=en").data.decode()
+    assert "1-2 hours a week" in page and "For work" in page
+    assert "1-2 часа в неделю" in client.get("/request/?lang=ru").data.decode()
+
+
+def test_error_messages_are_localized(client):
+    assert client.get("/goals/missing/?lang=en").data.decode() == \
+        "Nothing found! Bad luck, head back to the home page!"
+
+
+def test_response_cache_is_keyed_by_locale(client):
+    import app
+
+    client.get("/?lang=en")
+    assert "Tutors" in client.get("/goals/work/").data.decode()
+    assert "Преподаватели" in app.app.test_client().get("/goals/work/").data.decode()
+    assert {locale for path, locale in app.response_cache if path.startswith("/goals/work/")} == {"en", "ru"}
+
+
+def test_cached_catalog_serves_labels_without_queries(client, app_db):
+    client.get("/request/?lang=en")
+    statements = []
+
+    def record(*args):
+        statements.append(args[2])
+
+    event.listen(app_db.engine, "before_cursor_execute", record)
+    try:
+        assert client.get("/request/").status_code == 200
+    finally:
+        event.remove(app_db.engine, "before_cursor_execute", record)
+    assert statements == []
@@ -0,0 +1,25 @@
+import pytest
+
+from phones import normalize_phone, normalize_name
+
+
+@pytest.mark.parametrize("phone, canonical", [
+    ("+7 (912) 345-67-89", "+79123456789"),
+    ("8 912 345 67 89", "+79123456789"),
+    ("0049 30 1234567", "+49301234567"),
+    ("9123456789", "+79123456789"),
+    ("8 (912) 345-67-89, мобильный", "+79123456789"),
+    ("  +44 20 7946 0958  ", "+442079460958"),
+    ("не скажу", ""),
+])
+def test_normalize_phone(phone, canonical):
+    assert normalize_phone(phone) == canonical
+
+
+def test_normalize_phone_country_code():
+    assert normalize_phone("9123456789", country_code="375") == "+3759123456789"
+    assert normalize_phone("89123456789", country_code="375") == "+89123456789"
+
+
+def test_normalize_name():
+    assert normalize_name("  Иван   Петров ") == "Иван Петров"
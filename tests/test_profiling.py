@@ -0,0 +1,34 @@
+import os
+
+from profiling import Profiler
+
+
+def make_profiler(tmp_path, **config):
+    profiler = Profiler()
+    profiler.config = {"PROFILE_DIR": str(tmp_path), "PROFILE_MAX_FILES": 3, "PROFILE_MAX_BYTES": 1024, **config}
+    return profiler
+
+
+def write_files(tmp_path, count, size=10):
+    for index in range(count):
+        path = tmp_path / f"request-{index}.collapsed"
+        path.write_text("x" * size)
+        os.utime(path, (index, index))
+
+
+def test_output_path_is_unique(tmp_path):
+    profiler = make_profiler(tmp_path)
+    assert profiler.output_path("request", "prof") != profiler.output_path("request", "prof")
+
+
+def test_prune_keeps_newest_files_within_count(tmp_path):
+    write_files(tmp_path, 5)
+    (tmp_path / "notes.txt").write_text("keep")
+    make_profiler(tmp_path).output_path("request", "collapsed")
+    assert sorted(os.listdir(tmp_path)) == ["notes.txt", "request-3.collapsed", "request-4.collapsed"]
+
+
+def test_prune_keeps_newest_files_within_bytes(tmp_path):
+    write_files(tmp_path, 3, size=400)
+    make_profiler(tmp_path, PROFILE_MAX_FILES=100).output_path("request", "collapsed")
+    assert sorted(os.listdir(tmp_path)) == ["request-1.collapsed", "request-2.collapsed"]
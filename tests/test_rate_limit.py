@@ -0,0 +1,69 @@
+import pytest
+
+from rate_limit import MemoryStore, SharedStore, LocalSharedClient
+
+
+def test_memory_store_refills_over_time():
+    store = MemoryStore()
+    assert store.consume("ip:1", 2, 1.0, 0)
+    assert store.consume("ip:1", 2, 1.0, 0)
+    assert not store.consume("ip:1", 2, 1.0, 0.5)
+    assert store.consume("ip:1", 2, 1.0, 1.5)
+
+
+def test_memory_store_evicts_oldest_key():
+    store = MemoryStore(max_keys=2)
+    for key in ("a", "b", "c"):
+        store.consume(key, 1, 1.0, 0)
+    assert list(store.buckets) == ["b", "c"]
+
+
+def test_shared_store_with_local_client_is_bounded():
+    client = LocalSharedClient(max_keys=2)
+    store = SharedStore(client)
+    assert store.consume("phone:1", 1, 0.1, 0)
+    assert not store.consume("phone:1", 1, 0.1, 1)
+    for phone in range(10):
+        store.consume(f"phone:{phone}", 1, 0.1, 2)
+    assert len(client.store.buckets) == 2
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    import app
+
+    monkeypatch.setattr(app.limiter, "enabled", True)
+    monkeypatch.setattr(app.limiter, "store", MemoryStore())
+    monkeypatch.setattr(app.limiter, "limits", {"ip": (3, 0.001), "phone": (2, 0.001)})
+    monkeypatch.setattr(app.limiter, "rejected", {"ip": 0, "phone": 0})
+    return app.app.test_client()
+
+
+def test_ip_limit_runs_before_csrf_and_database(limited):
+    # no tables exist here, so anything past the limiter would fail with a 500
+    statuses = [limited.post("/request/", data={"client_phone": "+79120000001"}).status_code for _ in range(4)]
+    assert statuses == [400, 400, 400, 429]
+    assert limited.get("/ratelimit/stats/").get_json() == {"rejected": {"ip": 1, "phone": 0}}
+
+
+def test_forged_posts_do_not_spend_phone_bucket(app_db, limited, submit, monkeypatch):
+    import app
+
+    monkeypatch.setattr(app.limiter, "limits", {"ip": (100, 0.001), "phone": (2, 0.001)})
+    app_db.session.add(app.Goal(id=1, key_en="work", value_ru="Для работы", icon=""))
+    app_db.session.commit()
+    for _ in range(5):
+        assert limited.post("/request/", data={"client_phone": "+79120000001"}).status_code == 400
+
+    def send():
+        return submit(limited, "/request/", goal="work", time="5-7", client_name="Ivan", client_phone="89120000001")
+
+    assert [send().status_code for _ in range(3)] == [302, 302, 429]
+    assert limited.get("/ratelimit/stats/").get_json() == {"rejected": {"ip": 0, "phone": 1}}
+
+
+def test_gets_and_other_endpoints_are_not_limited(limited):
+    for _ in range(10):
+        assert limited.get("/ratelimit/stats/").status_code == 200
+        assert limited.post("/ratelimit/stats/").status_code == 405
+    assert limited.get("/ratelimit/stats/").get_json() == {"rejected": {"ip": 0, "phone": 0}}
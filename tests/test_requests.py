@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def client(app_db):
+    import app
+
+    app_db.session.add(app.Goal(id=1, key_en="work", value_ru="Для работы", icon=""))
+    app_db.session.commit()
+    return app.app.test_client()
+
+
+@pytest.fixture
+def send(submit):
+    def post(client, name, phone):
+        return submit(client, "/request/", goal="work", time="5-7", client_name=name, client_phone=phone)
+    return post
+
+
+def rows(app_db):
+    import app
+
+    return app_db.session.query(app.Request.client_name, app.Request.client_phone_canonical)\
+        .order_by(app.Request.id).all()
+
+
+def test_repeat_inside_window_updates_request(client, send, app_db):
+    assert send(client, "Ivan", "8 912 345-67-89").status_code == 302
+    assert send(client, "Ivan  Petrov", "+7 912 345 67 89").status_code == 302
+    assert rows(app_db) == [("Ivan Petrov", "+79123456789")]
+
+
+def test_repeat_outside_window_inserts_request(client, send, app_db):
+    import app
+
+    assert send(client, "Ivan", "89123456789").status_code == 302
+    app_db.session.query(app.Request).update(
+        {app.Request.created_at: datetime.utcnow() - app.app.config['DEDUP_WINDOW'] - timedelta(minutes=1)})
+    app_db.session.commit()
+    assert send(client, "Ivan", "89123456789").status_code == 302
+    assert len(rows(app_db)) == 2
+
+
+def test_phone_without_digits_is_rejected(client, send, app_db):
+    assert send(client, "Ivan", "нет").status_code == 200
+    assert send(client, "Maria", "не скажу").status_code == 200
+    assert rows(app_db) == []
@@ -0,0 +1,104 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from resilience import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+    assert breaker.retry_after() >= 60
+
+
+def test_half_open_allows_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    trip(breaker)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    trip(breaker)
+    breaker.opened_at -= 60
+    assert breaker.state == HALF_OPEN and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.probing
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    import app
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    monkeypatch.setattr(app, "db_breaker", breaker)
+    trip(breaker)
+    return breaker
+
+
+def test_db_guarded_clears_probe_on_http_error(breaker, app_db):
+    from app import app
+
+    client = app.test_client()
+    assert client.get("/profiles/404/").status_code == 404
+    assert breaker.state == CLOSED and not breaker.probing
+
+
+def test_db_guarded_records_outage(breaker, app_db):
+    from app import app, db_guarded
+
+    @db_guarded(fallback=lambda: "later")
+    def view():
+        raise OperationalError("SELECT 1", {}, Exception("down"))
+
+    with app.test_request_context():
+        assert view() == "later"
+    assert breaker.failures == 2 and not breaker.probing
+
+
+@pytest.fixture
+def stale_catalog(app_db, monkeypatch):
+    import app
+
+    app.catalog_cache["catalog"] = app.load_catalog()
+    app.catalog_cache["loaded_at"] = 0
+
+    def load_catalog():
+        raise AssertionError("fallback reloaded the catalog")
+
+    monkeypatch.setattr(app, "load_catalog", load_catalog)
+    return app.catalog_cache["catalog"]
+
+
+def test_fallback_serves_stale_catalog_while_open(monkeypatch, stale_catalog):
+    import app
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    trip(breaker)
+    monkeypatch.setattr(app, "db_breaker", breaker)
+    assert app.app.test_client().get("/").status_code == 200
+
+
+def test_first_fallback_does_not_reload_catalog(monkeypatch, stale_catalog):
+    import app as module
+    from app import app, db_guarded, get_catalog
+
+    monkeypatch.setattr(module, "db_breaker", CircuitBreaker(failure_threshold=5, reset_timeout=60))
+
+    @db_guarded(fallback=lambda: get_catalog())
+    def view():
+        raise OperationalError("SELECT 1", {}, Exception("down"))
+
+    with app.test_request_context():
+        assert view() is stale_catalog
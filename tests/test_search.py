@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+from search import InvertedIndex, tokenize
+
+postgres_only = pytest.mark.skipif(not os.environ["DATABASE_URL"].startswith("postgres"),
+                                   reason="full-text search needs DATABASE_URL pointing at Postgres")
+
+
+def test_tokenize_handles_russian_and_english():
+    assert tokenize("Репетитор English, a b") == ["репетитор", "english"]
+
+
+def test_inverted_index_requires_all_terms():
+    index = InvertedIndex()
+    index.add(1, "Anna", "business english")
+    index.add(2, "Boris", "english for travel")
+    assert set(index.search("english")) == {1, 2}
+    assert set(index.search("business english")) == {1}
+    assert index.search("business travel") == {}
+    assert index.search("unknown") == {}
+    assert index.search("") == {}
+
+
+def test_inverted_index_ranks_name_matches_higher():
+    index = InvertedIndex()
+    index.add(1, "Travel Tom", "lessons")
+    index.add(2, "Tom", "lessons about travel")
+    scores = index.search("travel")
+    assert scores[1] > scores[2]
+
+
+@pytest.fixture
+def catalog(app_db):
+    import app
+
+    app.search_index["index"] = None
+    goals = {key: app.Goal(key_en=key, value_ru=key, icon="") for key in ("work", "travel")}
+    for number in range(1, 6):
+        teacher = app.Teacher(id=number, name=f"Teacher {number}", about="english lessons",
+                              rating=number, picture="", price=1000 * number, free=json.dumps({}))
+        teacher.goals.append(goals["work"] if number % 2 else goals["travel"])
+        app_db.session.add(teacher)
+    app_db.session.add(app.Teacher(id=6, name="Other", about="piano", rating=5, picture="", price=1,
+                                   free=json.dumps({})))
+    app_db.session.commit()
+    return app
+
+
+def test_search_teachers_filters_by_goal_and_sorts(catalog):
+    pagination = catalog.search_teachers("english", "work", "cheap_first", 1)
+    assert [teacher.id for teacher in pagination.items] == [1, 3, 5]
+    assert pagination.total == 3
+
+
+def test_search_teachers_paginates(catalog):
+    catalog.app.config['SEARCH_PER_PAGE'] = 2
+    try:
+        first = catalog.search_teachers("english", "", "expensive_first", 1)
+        last = catalog.search_teachers("english", "", "expensive_first", 3)
+    finally:
+        catalog.app.config['SEARCH_PER_PAGE'] = 10
+    assert first.total == 5
+    assert first.pages == 3
+    assert [teacher.id for teacher in first.items] == [5, 4]
+    assert [teacher.id for teacher in last.items] == [1]
+
+
+def test_search_teachers_without_matches(catalog):
+    assert catalog.search_teachers("violin", "", "random", 1).total == 0
+
+
+@postgres_only
+def test_postgres_search_stems_both_languages(catalog, app_db):
+    app_db.session.add(catalog.Teacher(id=7, name="Ольга", about="уроки разговорного английского", rating=5,
+                                       picture="", price=1, free=json.dumps({})))
+    app_db.session.commit()
+    assert catalog.search_teachers("lesson", "work", "cheap_first", 1).total == 3
+    assert [teacher.id for teacher in catalog.search_teachers("урок", "", "random", 1).items] == [7]
+
+
+@postgres_only
+def test_postgres_search_ranks_name_matches_first(catalog, app_db):
+    app_db.session.add(catalog.Teacher(id=7, name="Piano Pete", about="lessons", rating=1, picture="", price=1,
+                                       free=json.dumps({})))
+    app_db.session.commit()
+    assert [teacher.id for teacher in catalog.search_teachers("piano", "", "random", 1).items] == [7, 6]